@@ -1,7 +1,9 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from typing import Dict, Any
 import httpx
+import logging
 import os 
 import sys
 from dotenv import load_dotenv
@@ -12,18 +14,62 @@ PROJECT_ROOT = os.path.abspath(
 )
 sys.path.insert(0, PROJECT_ROOT)
 print(PROJECT_ROOT)
-#from service.web import Searcher
+from service.web import Searcher
 from service.google_web import GoogleSearcher 
-searcher_instance = GoogleSearcher()
+from service.composite import CompositeSearcher, SearchProvider
+from service.result_cache import CachedSearcher
+
+# Providers queried concurrently; SEARCH_MODE=race takes the first non-empty answer,
+# SEARCH_MODE=merge fuses all of them with reciprocal-rank fusion
+SEARCH_PROVIDER_FACTORIES = {
+    "google": GoogleSearcher,
+    "duckduckgo": Searcher,
+}
+searcher_instance = CompositeSearcher(
+    [
+        SearchProvider(
+            name=name,
+            searcher=SEARCH_PROVIDER_FACTORIES[name](),
+            timeout=float(os.getenv(f"SEARCH_TIMEOUT_{name.upper()}", 5.0))
+        )
+        for name in (
+            provider.strip().lower()
+            for provider in os.getenv("SEARCH_PROVIDERS", "google,duckduckgo").split(",")
+        )
+        if name in SEARCH_PROVIDER_FACTORIES
+    ],
+    mode=os.getenv("SEARCH_MODE", "race").lower()
+)
+# Identical concurrent queries share one upstream search; results are cached for SEARCH_CACHE_TTL
+search_cache = CachedSearcher.from_env(searcher_instance)
 from mcp_client.schemas import ToolRequest, ToolResponse
 
-app = FastAPI(title="Searcher Agent")
+# gRPC transport alongside HTTP, enabled by setting a port
+GRPC_PORT = int(os.getenv("GRPC_PORT", 0))
+# Routable address the gateway should dial (e.g. searcher:50051); without it only HTTP is advertised
+GRPC_TARGET = os.getenv("GRPC_TARGET", "") if GRPC_PORT else ""
+if GRPC_PORT and not GRPC_TARGET:
+    logging.warning("GRPC_PORT is set without GRPC_TARGET; tools are advertised over HTTP only")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    grpc_server = None
+    if GRPC_PORT:
+        from mcp_server.grpc_server import serve
+        grpc_server, search_servicer = await serve(GRPC_PORT, search_cache, TOOLS)
+    yield
+    if grpc_server is not None:
+        await grpc_server.stop(grace=5)
+        await search_servicer.aclose()
+    await search_cache.aclose()
+
+app = FastAPI(title="Searcher Agent", lifespan=lifespan)
 
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL")
 
 TOOLS ={
     "Searcher": {
-        "function": searcher_instance.search,
+        "function": search_cache.search,
         "description": "Gives search result for given query",
         "parameters": {"query":"str"}
     }
@@ -48,7 +94,7 @@ async def execute_tool(tool_name: str, request: ToolRequest) -> ToolResponse:
     
     try:
         tool_function = TOOLS["Searcher"]["function"]
-        results = tool_function(request.user_q)
+        results = await tool_function(request.user_q, request.num_results or 10)
 
         if not results:
             return ToolResponse(results=[])
@@ -59,39 +105,61 @@ async def execute_tool(tool_name: str, request: ToolRequest) -> ToolResponse:
         return ToolResponse(results=[{"title": "Error", "link": str(e)}])
 
 
+@app.get("/tools")
+async def list_tools():
+    """Tool descriptions in the shape the MCP gateway's discovery expects"""
+    return {
+        tool_name: {
+            "description": tool_info["description"],
+            "parameters": tool_info["parameters"],
+            "grpc_target": GRPC_TARGET
+        }
+        for tool_name, tool_info in TOOLS.items()
+    }
+
+
 @app.post("/register-with-mcp")
 async def register_with_mcp():
-    failed_tool = []
-    registered_tools = []
-    for tool_name, tool_info in TOOLS.items():
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{MCP_SERVER_URL}/admin/register-tool",
-                    json={
-                        "tool_name" : tool_name,
-                        "tool_service_url" : os.getenv('K_SERVICE','http://0.0.0.0:8000'),
-                        "description": tool_info["description"],
-                        "parameters" : tool_info["parameters"]
-                    },
-                    timeout=10.0
-                )
-                if response.status_code == 200:
-                    registered_tools.append(tool_name)
-                else:
-                    failed_tool.append(f"{tool_name}: {response.text}")
-
-        except Exception as e:
-            failed_tool.append(f"{tool_name}:{str(e)}")
+    """Register every tool with the MCP gateway in a single bulk request"""
+    tools = await list_tools()
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{MCP_SERVER_URL}/admin/register-tools",
+                json={
+                    "tools": [
+                        {
+                            "tool_name" : tool_name,
+                            "tool_service_url" : os.getenv('K_SERVICE','http://0.0.0.0:8000'),
+                            **tool_info
+                        }
+                        for tool_name, tool_info in tools.items()
+                    ]
+                },
+                timeout=10.0
+            )
+        response.raise_for_status()
+        result = response.json()
+    except Exception as e:
+        return {
+            "registered": [],
+            "failed": [f"{tool_name}:{str(e)}" for tool_name in TOOLS],
+            "total_tools": len(TOOLS)
+        }
 
-    
     return {
-        "registered": registered_tools,
-        "failed": failed_tool,
+        "registered": result["registered"] + result["skipped"],
+        "failed": result["failed"],
         "total_tools": len(TOOLS)
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Search cache, coalescing and API quota usage"""
+    return {"searcher": search_cache.stats()}
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy",
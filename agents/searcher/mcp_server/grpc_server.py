@@ -0,0 +1,85 @@
+import logging
+import os
+import sys
+from typing import Any, Dict
+
+import grpc
+
+# Generated stubs and proto converters live under shared/ at the repository root
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from mcp_client.schemas import ToolRequest
+from shared.protos.compiled import mcp_core_pb2, mcp_core_pb2_grpc, searcher_pb2, searcher_pb2_grpc
+from shared.utils.protobuf import message_to_dict, to_message
+
+logger = logging.getLogger(__name__)
+
+
+class SearcherAgentServicer(searcher_pb2_grpc.SearcherAgentServicer):
+    """Search over gRPC, sharing the HTTP service's searcher and its cache"""
+
+    def __init__(self, searcher):
+        self.searcher = searcher
+        self._pipeline = None
+
+    @property
+    def pipeline(self):
+        # Built on first use: the summarizer needs LLM credentials plain search doesn't
+        if self._pipeline is None:
+            from service.pipeline import SummaryPipeline
+            self._pipeline = SummaryPipeline(self.searcher)
+        return self._pipeline
+
+    async def aclose(self):
+        if self._pipeline is not None:
+            await self._pipeline.aclose()
+
+    async def Search(self, request, context):
+        try:
+            results = await self.searcher.search(request.user_q, request.num_results or 10)
+        except Exception as e:
+            logger.error(f"Search error: {str(e)}")
+            await context.abort(grpc.StatusCode.INTERNAL, str(e))
+        return to_message({"results": results}, searcher_pb2.SearchResponse)
+
+    async def SearchWithSummaries(self, request, context):
+        async for summarized in self.pipeline.search_with_summaries(request.user_q, request.num_results or 5):
+            yield to_message(vars(summarized), searcher_pb2.SummarizedResult)
+
+
+class ToolServiceServicer(mcp_core_pb2_grpc.ToolServiceServicer):
+    """Generic tool endpoint the MCP gateway's proxy tools call over gRPC"""
+
+    def __init__(self, tools: Dict[str, Dict[str, Any]]):
+        self.tools = tools
+
+    async def Execute(self, request, context):
+        tool = self.tools.get(request.tool_name)
+        if tool is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, f"Tool '{request.tool_name}' not found")
+
+        parameters = message_to_dict(request)["parameters"]
+        try:
+            tool_request = ToolRequest(
+                user_q=parameters.get("user_q", parameters.get("query")),
+                num_results=parameters.get("num_results", 10)
+            )
+            results = await tool["function"](tool_request.user_q, tool_request.num_results or 10)
+            return to_message({"result": results or []}, mcp_core_pb2.ToolResult)
+        except Exception as e:
+            logger.error(f"Tool '{request.tool_name}' failed: {str(e)}")
+            return mcp_core_pb2.ToolResult(error=str(e))
+
+
+async def serve(port: int, searcher, tools: Dict[str, Dict[str, Any]]):
+    """Start the searcher gRPC server on port; returns (server, search servicer) for shutdown"""
+    server = grpc.aio.server()
+    search_servicer = SearcherAgentServicer(searcher)
+    searcher_pb2_grpc.add_SearcherAgentServicer_to_server(search_servicer, server)
+    mcp_core_pb2_grpc.add_ToolServiceServicer_to_server(ToolServiceServicer(tools), server)
+    server.add_insecure_port(f"0.0.0.0:{port}")
+    await server.start()
+    logger.info(f"Searcher gRPC server listening on port {port}")
+    return server, search_servicer
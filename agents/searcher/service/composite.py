@@ -0,0 +1,202 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+RACE = "race"
+MERGE = "merge"
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, None for no samples"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used to dedupe the same page returned by different providers"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith("utm_")
+    ))
+    path = parts.path.rstrip("/") or "/"
+    # Scheme is dropped: http/https copies of a page are the same result
+    return urlunsplit(("", host, path, query, ""))
+
+
+def normalize_result(result: Dict[str, str]) -> Dict[str, str]:
+    """Every provider's results carry title, link and snippet (empty when the provider has none)"""
+    return {
+        **result,
+        "title": result.get("title", ""),
+        "link": result.get("link", ""),
+        "snippet": result.get("snippet") or "",
+    }
+
+
+def has_snippets(results: List[Dict[str, str]]) -> bool:
+    return any(result["snippet"] for result in results)
+
+
+@dataclass
+class SearchProvider:
+    """A search backend with its own timeout and latency statistics"""
+    name: str
+    searcher: object
+    timeout: float = 5.0
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    empty: int = 0
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=500))
+
+    async def search(self, query: str, num_results: int) -> List[Dict[str, str]]:
+        self.calls += 1
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(self.searcher.search):
+                call = self.searcher.search(query, num_results)
+            else:
+                # Blocking searchers (e.g. the DuckDuckGo scraper) run in a thread
+                call = asyncio.to_thread(self.searcher.search, query, num_results)
+            results = await asyncio.wait_for(call, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Search provider '{self.name}' timed out after {self.timeout}s")
+            return []
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Search provider '{self.name}' failed: {e}")
+            return []
+        finally:
+            self.latencies_ms.append(1000 * (time.perf_counter() - start))
+
+        if not results:
+            self.empty += 1
+        return [normalize_result(result) for result in results or []]
+
+    def stats(self) -> Dict:
+        latencies = list(self.latencies_ms)
+        stats = {
+            "timeout": self.timeout,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "empty": self.empty,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "mean": sum(latencies) / len(latencies) if latencies else None,
+            },
+        }
+        if hasattr(self.searcher, "stats"):
+            stats["backend"] = self.searcher.stats()
+        return stats
+
+
+class CompositeSearcher:
+    """
+    Queries several search providers concurrently.
+
+    "race" returns the first result set that has snippets and cancels the
+    rest; a snippet-less set (the DuckDuckGo scraper returns titles and links
+    only) is kept as a fallback until every provider has answered, because
+    the validator scores snippets. "merge" waits for every provider (each
+    bounded by its own timeout), dedupes by normalised URL and orders by
+    reciprocal-rank fusion, filling a missing snippet from another provider.
+
+    Provider priority follows list order (SEARCH_PROVIDERS, google first by
+    default): it only breaks ties, since race takes whichever good set
+    arrives first. Every result has title, link and snippet keys.
+    """
+
+    def __init__(self, providers: List[SearchProvider], mode: str = RACE, rrf_k: int = 60):
+        if mode not in (RACE, MERGE):
+            raise ValueError(f"Unknown search mode '{mode}', expected '{RACE}' or '{MERGE}'")
+        self.providers = providers
+        self.mode = mode
+        self.rrf_k = rrf_k
+        self.wins: Dict[str, int] = {provider.name: 0 for provider in providers}
+
+    async def search(self, query: str, num_results: int = 10) -> List[Dict[str, str]]:
+        if self.mode == RACE:
+            return await self._race(query, num_results)
+        return await self._merge(query, num_results)
+
+    async def _race(self, query: str, num_results: int) -> List[Dict[str, str]]:
+        tasks = {
+            asyncio.create_task(provider.search(query, num_results)): provider
+            for provider in self.providers
+        }
+        pending = set(tasks)
+        fallback, fallback_provider = [], None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Same-moment finishers are taken in provider order
+                for task in sorted(done, key=lambda task: self.providers.index(tasks[task])):
+                    results = task.result()
+                    if results and has_snippets(results):
+                        self.wins[tasks[task].name] += 1
+                        return results[:num_results]
+                    if results and not fallback:
+                        fallback, fallback_provider = results, tasks[task]
+            if fallback:
+                self.wins[fallback_provider.name] += 1
+            return fallback[:num_results]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _merge(self, query: str, num_results: int) -> List[Dict[str, str]]:
+        result_sets = await asyncio.gather(*(
+            provider.search(query, num_results) for provider in self.providers
+        ))
+
+        scores: Dict[str, float] = {}
+        best_rank: Dict[str, int] = {}
+        records: Dict[str, Dict[str, str]] = {}
+        for results in result_sets:
+            for rank, result in enumerate(results, 1):
+                url = result.get("link", "")
+                if not url:
+                    continue
+                key = normalize_url(url)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank)
+                # Keep the record from whichever provider ranked it highest
+                if rank < best_rank.get(key, rank + 1):
+                    best_rank[key] = rank
+                    snippet = records[key]["snippet"] if key in records else ""
+                    records[key] = {**result, "snippet": result["snippet"] or snippet}
+                elif not records[key]["snippet"] and result["snippet"]:
+                    records[key] = {**records[key], "snippet": result["snippet"]}
+
+        fused = sorted(scores, key=scores.get, reverse=True)[:num_results]
+        return [records[key] for key in fused]
+
+    async def aclose(self):
+        for provider in self.providers:
+            close = getattr(provider.searcher, "aclose", None)
+            if close is not None:
+                await close()
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "wins": dict(self.wins),
+            "providers": {provider.name: provider.stats() for provider in self.providers},
+        }
@@ -0,0 +1,160 @@
+import asyncio
+import codecs
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional
+
+# Subtrees dropped without collecting their text (same set get_page_content decomposed)
+SKIP_TAGS = frozenset({'script', 'style', 'nav', 'footer', 'noscript', 'template', 'svg'})
+
+DEFAULT_MAX_CHARS = 20000           # text budget handed to the summarizer
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024  # stop downloading after this many bytes
+# Raw bytes collected before each parse step off the event loop
+PARSE_BATCH_BYTES = 64 * 1024
+
+
+class StreamingTextExtractor(HTMLParser):
+    """
+    Incremental HTML-to-text extractor.
+
+    Feed it decoded chunks as they arrive; boilerplate subtrees are skipped
+    without being built, and `done` turns True once max_chars of text have
+    been collected so the caller can stop downloading. The output matches
+    BeautifulSoup's get_text(separator=' ', strip=True) on the kept text.
+    """
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._parts: List[str] = []
+        self._length = 0
+        self._pending: List[str] = []
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+        elif tag in SKIP_TAGS:
+            self._skip_tag = tag
+            self._skip_depth = 1
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags (<br/>, <img/>) never open a subtree
+        self._flush()
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if self._skip_tag is not None and tag == self._skip_tag:
+            self._skip_depth -= 1
+            if self._skip_depth == 0:
+                self._skip_tag = None
+
+    def handle_data(self, data):
+        if self._skip_tag is None and not self.done:
+            # A text run may arrive in pieces; join them before stripping
+            self._pending.append(data)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        text = ''.join(self._pending).strip()
+        self._pending = []
+        if not text or self.done:
+            return
+
+        separator = 1 if self._parts else 0
+        remaining = self.max_chars - self._length - separator
+        if len(text) >= remaining:
+            text = text[:max(remaining, 0)]
+            self.done = True
+        if text:
+            self._parts.append(text)
+            self._length += separator + len(text)
+
+    def feed(self, data: str) -> bool:
+        """Parse another chunk; returns True once the character budget is reached"""
+        if not self.done:
+            super().feed(data)
+        return self.done
+
+    def close(self, truncated: bool = False):
+        # A truncated download may end mid-tag; don't let the parser emit it as text
+        if not (self.done or truncated):
+            super().close()
+        self._flush()
+
+    @property
+    def text(self) -> str:
+        return ' '.join(self._parts)
+
+
+class _BodyReader:
+    """Decodes raw body chunks into an extractor while enforcing the byte budget"""
+
+    def __init__(self, encoding: Optional[str], max_chars: int, max_bytes: int):
+        self.extractor = StreamingTextExtractor(max_chars)
+        self.max_bytes = max_bytes
+        self.received = 0
+        self.truncated = False
+        try:
+            self.decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def feed(self, chunk: bytes) -> bool:
+        """Returns True when reading should stop"""
+        self.received += len(chunk)
+        if self.received >= self.max_bytes:
+            chunk = chunk[:len(chunk) - (self.received - self.max_bytes)]
+            self.truncated = True
+        return self.extractor.feed(self.decoder.decode(chunk)) or self.truncated
+
+    def finish(self) -> str:
+        if not (self.extractor.done or self.truncated):
+            self.extractor.feed(self.decoder.decode(b'', final=True))
+        self.extractor.close(truncated=self.truncated)
+        return self.extractor.text
+
+
+def extract_from_chunks(
+    chunks: Iterable[bytes],
+    encoding: Optional[str] = None,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> str:
+    """Extract text from an iterable of raw body chunks, stopping at either budget"""
+    reader = _BodyReader(encoding, max_chars, max_bytes)
+    for chunk in chunks:
+        if reader.feed(chunk):
+            break
+    return reader.finish()
+
+
+async def extract_from_response(
+    response,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> str:
+    """
+    Async counterpart of extract_from_chunks for a streaming httpx.Response.
+    Parsing is pure Python, so chunks are batched and parsed in a worker
+    thread; the event loop only moves bytes.
+    """
+    reader = _BodyReader(response.encoding, max_chars, max_bytes)
+    batch: List[bytes] = []
+    batch_bytes = 0
+    stopped = False
+    async for chunk in response.aiter_bytes():
+        batch.append(chunk)
+        batch_bytes += len(chunk)
+        if batch_bytes >= PARSE_BATCH_BYTES:
+            stopped = await asyncio.to_thread(reader.feed, b''.join(batch))
+            batch, batch_bytes = [], 0
+            if stopped:
+                break
+    if batch and not stopped:
+        await asyncio.to_thread(reader.feed, b''.join(batch))
+    return await asyncio.to_thread(reader.finish)
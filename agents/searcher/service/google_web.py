@@ -1,7 +1,12 @@
 # search.py
-import requests
+import asyncio
+import httpx
 import logging
-from typing import List, Dict
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -9,77 +14,212 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+API_URL = "https://www.googleapis.com/customsearch/v1"
+PAGE_SIZE = 10      # Custom Search returns at most 10 items per request
+MAX_RESULTS = 100   # and never more than 100 in total (start + num <= 101)
+
+# Custom Search quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+
+class PartialResults(list):
+    """Results missing at least one page (failed request or quota cut); never cached as complete"""
+    partial = True
+
+
+class QuotaTracker:
+    """Counts Custom Search API requests against a daily limit"""
+
+    def __init__(self, daily_limit: int):
+        self.daily_limit = daily_limit
+        self.day = self._today()
+        self.used = 0
+        self.exhausted = False
+
+    @staticmethod
+    def _today():
+        return datetime.now(QUOTA_TIMEZONE).date()
+
+    def _roll(self):
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+            self.exhausted = False
+
+    @property
+    def remaining(self) -> int:
+        self._roll()
+        return 0 if self.exhausted else max(self.daily_limit - self.used, 0)
+
+    def record(self, requests: int = 1):
+        self._roll()
+        self.used += requests
+
+    def mark_exhausted(self):
+        """The API said so (HTTP 429) even if our count disagrees"""
+        self._roll()
+        self.exhausted = True
+
+    def stats(self) -> Dict:
+        return {
+            "day": self.day.isoformat(),
+            "used": self.used,
+            "daily_limit": self.daily_limit,
+            "remaining": self.remaining,
+        }
+
+
 class GoogleSearcher:
-    def __init__(self, api_key: str = None, search_engine_id: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        search_engine_id: str = None,
+        cache_ttl: float = None,
+        cache_size: int = 1000,
+        daily_quota: int = None
+    ):
         """
         Initialize with your Google Custom Search API credentials.
         You can get these from Google Cloud Console.
         """
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; rv:109.0) Gecko/20100101 Firefox/115.0",
-            "Accept-Language": "en-US,en;q=0.5"
-        })
-        
+        self.client = httpx.AsyncClient(
+            headers={
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; rv:109.0) Gecko/20100101 Firefox/115.0",
+                "Accept-Language": "en-US,en;q=0.5"
+            },
+            timeout=10
+        )
+
         # Get credentials from environment variables if not provided
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
         self.search_engine_id = search_engine_id or os.getenv('GOOGLE_SEARCH_ENGINE_ID')
-        
+
         if not self.api_key or not self.search_engine_id:
             logger.error("Google API key and search engine ID must be provided")
 
-    def search(self, query: str, num_results: int = 10) -> List[Dict[str, str]]:
+        # (query, num) -> (fetched_at, results); stale entries are kept for quota outages
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv('GOOGLE_CACHE_TTL', 3600))
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[float, List[Dict[str, str]]]]" = OrderedDict()
+        self.quota = QuotaTracker(
+            daily_quota if daily_quota is not None else int(os.getenv('GOOGLE_DAILY_QUOTA', 100))
+        )
+        self.cache_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def search(self, query: str, num_results: int = 10) -> List[Dict[str, str]]:
         """Search using Google Custom Search API and return titles and links"""
+        num_results = max(1, min(num_results, MAX_RESULTS))
+        key = (" ".join(query.lower().split()), num_results)
+
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached[1]
+
+        pages = -(-num_results // PAGE_SIZE)
+        if self.quota.remaining < pages and cached is not None:
+            logger.warning(f"Search quota low ({self.quota.remaining} left), serving stale results for '{query}'")
+            self.stale_hits += 1
+            return cached[1]
+
+        self.misses += 1
         try:
-            results = self._api_search(query, num_results)
-            return results[:num_results]
+            results = await self._api_search(query, num_results)
         except Exception as e:
             logger.error(f"Search failed: {e}")
+            results = []
+
+        if results and getattr(results, "partial", False):
+            # Serve what arrived, but let the next call retry the missing pages
+            return results
+        if results:
+            self._cache[key] = (time.monotonic(), results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        elif cached is not None:
+            self.stale_hits += 1
+            return cached[1]
+        return results[:num_results]
+
+    async def _api_search(self, query: str, num_results: int) -> List[Dict[str, str]]:
+        """
+        Use Google's Custom Search JSON API, fetching result pages concurrently.
+        Returns PartialResults when any page is missing.
+        """
+        wanted = list(range(1, num_results + 1, PAGE_SIZE))
+        # Never spend more requests than the quota has left
+        starts = wanted[:self.quota.remaining]
+        if not starts:
+            logger.error("Daily search quota exhausted")
             return []
 
-    def _api_search(self, query: str, num_results: int) -> List[Dict[str, str]]:
-        """Use Google's Custom Search JSON API"""
+        pages = await asyncio.gather(*(
+            self._fetch_page(query, start, min(PAGE_SIZE, num_results - start + 1))
+            for start in starts
+        ))
+        # Pages come back in request order, so ranking is preserved
+        results = [item for page in pages if page for item in page][:num_results]
+        if len(starts) < len(wanted) or any(page is None for page in pages):
+            return PartialResults(results)
+        return results
+
+    async def _fetch_page(self, query: str, start: int, num: int) -> Optional[List[Dict[str, str]]]:
+        """One page of results, or None if the request failed"""
         try:
-            # Google API returns up to 10 results per request
-            # For more than 10, we'd need to implement pagination
-            items_per_request = min(num_results, 10)
-            
             params = {
                 "key": self.api_key,
                 "cx": self.search_engine_id,
                 "q": query,
-                "num": items_per_request
+                "num": num,
+                "start": start
             }
-            
-            response = self.session.get(
-                "https://www.googleapis.com/customsearch/v1",
-                params=params,
-                timeout=10
-            )
+
+            self.quota.record()
+            response = await self.client.get(API_URL, params=params)
+            if response.status_code == 429:
+                self.quota.mark_exhausted()
             response.raise_for_status()
             data = response.json()
-            
+
             return [{
                 "title": item["title"],
-                "link": item["link"]
+                "link": item["link"],
+                "snippet": item.get("snippet", "")
             } for item in data.get("items", [])]
-            
-        except requests.exceptions.RequestException as e:
+
+        except httpx.HTTPError as e:
             logger.error(f"API request failed: {e}")
-            return []
+            return None
         except KeyError as e:
             logger.error(f"Unexpected API response format: {e}")
-            return []
+            return None
         except Exception as e:
             logger.error(f"API search failed: {e}")
-            return []
+            return None
+
+    def stats(self) -> Dict:
+        return {
+            "cache_entries": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "quota": self.quota.stats(),
+        }
 
 # Usage
 # if __name__ == "__main__":
 #     # Initialize with your credentials or set them as environment variables
 #     searcher = GoogleSearcher()
-#     results = searcher.search("what is EBITA", 10)
-    
+#     results = asyncio.run(searcher.search("what is EBITA", 10))
+
 #     for i, result in enumerate(results, 1):
 #         print(f"{i}. {result['title']}")
-#         print(f"   {result['link']}\n")
\ No newline at end of file
+#         print(f"   {result['link']}\n")
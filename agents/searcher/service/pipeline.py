@@ -0,0 +1,121 @@
+import asyncio
+import inspect
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from service.extract import DEFAULT_MAX_BYTES, DEFAULT_MAX_CHARS, extract_from_response
+from service.schemas_web import SummarizedResult
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; rv:109.0) Gecko/20100101 Firefox/115.0",
+    "Accept-Language": "en-US,en;q=0.5"
+}
+
+
+class SummaryPipeline:
+    """
+    Concurrent search -> fetch -> extract -> summarize pipeline.
+
+    Pages are fetched concurrently through one shared AsyncClient with at most
+    per_host_limit requests per host, and text is extracted incrementally in a
+    worker thread as bytes arrive (stopping at max_chars of text or max_bytes
+    downloaded).
+    Summaries run concurrently under a semaphore. Results are yielded as each
+    one finishes, so total latency tracks the slowest result, not the sum.
+    """
+
+    def __init__(
+        self,
+        searcher,
+        summarizer=None,
+        client: Optional[httpx.AsyncClient] = None,
+        per_host_limit: int = 2,
+        max_summaries: int = 5,
+        timeout: float = 10.0,
+        max_chars: int = DEFAULT_MAX_CHARS,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        if summarizer is None:
+            from service.summarizer import summarizer
+        self.searcher = searcher
+        self.summarizer = summarizer
+        self.client = client or httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        )
+        self.max_chars = max_chars
+        self.max_bytes = max_bytes
+        self.per_host_limit = per_host_limit
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._summary_limit = asyncio.Semaphore(max_summaries)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _search(self, query: str, num_results: int) -> List[Dict[str, str]]:
+        if inspect.iscoroutinefunction(self.searcher.search):
+            return await self.searcher.search(query, num_results)
+        # Blocking searchers run off the event loop
+        return await asyncio.to_thread(self.searcher.search, query, num_results)
+
+    async def get_page_content(self, url: str) -> str:
+        """Stream a page under its host's concurrency cap, extracting text as it arrives"""
+        async with self._host_limit(url):
+            async with self.client.stream("GET", url) as response:
+                response.raise_for_status()
+                # Leaving the block early closes the connection instead of reading the rest
+                return await extract_from_response(response, self.max_chars, self.max_bytes)
+
+    async def _process(self, query: str, result: Dict[str, str], rank: int, total: int) -> Optional[SummarizedResult]:
+        url = result.get("link", "")
+        try:
+            content = await self.get_page_content(url)
+            if not content:
+                return None
+
+            async with self._summary_limit:
+                summary = await self.summarizer.summarize_content(content, query)
+
+            return SummarizedResult(
+                url=url,
+                title=result.get("title", ""),
+                summary=summary,
+                key_points=[],
+                # Search engine order is the only relevance signal available here
+                relevance_score=1.0 - (rank - 1) / total,
+                rank=rank,
+                domain=urlparse(url).netloc
+            )
+        except Exception as e:
+            logger.warning(f"Failed to summarize {url}: {e}")
+            return None
+
+    async def search_with_summaries(self, query: str, num_results: int = 5) -> AsyncIterator[SummarizedResult]:
+        """Yield a SummarizedResult for each search hit as soon as it is ready"""
+        results = await self._search(query, num_results)
+        tasks = [
+            asyncio.create_task(self._process(query, result, rank, len(results)))
+            for rank, result in enumerate(results, 1)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                summarized = await next_done
+                if summarized is not None:
+                    yield summarized
+        finally:
+            # Consumer stopped early: don't leave fetches and LLM calls running
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, int]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(str(query).lower().split())
+
+
+class SqliteResultStore:
+    """Search results persisted across restarts in a local SQLite file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "query TEXT NOT NULL, num_results INTEGER NOT NULL, "
+            "stored_at REAL NOT NULL, results TEXT NOT NULL, "
+            "PRIMARY KEY (query, num_results))"
+        )
+        self._db.commit()
+
+    def get(self, key: CacheKey, ttl: float) -> Optional[Tuple[float, List[Dict[str, str]]]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT stored_at, results FROM results WHERE query = ? AND num_results = ?", key
+            ).fetchone()
+        if row is None or time.time() - row[0] >= ttl:
+            return None
+        return row[0], json.loads(row[1])
+
+    def put(self, key: CacheKey, results: List[Dict[str, str]]):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (*key, time.time(), json.dumps(results, separators=(",", ":")))
+            )
+            self._db.commit()
+
+    def prune(self, ttl: float) -> int:
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM results WHERE stored_at < ?", (time.time() - ttl,)
+            ).rowcount
+            self._db.commit()
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachedSearcher:
+    """
+    Single-flight, TTL-cached front for a searcher.
+
+    Concurrent calls for the same (normalised query, num_results) share one
+    upstream search; completed non-empty results are kept in an in-memory
+    LRU for ttl seconds and, when a path is given, in SQLite so a restart
+    doesn't spend API quota re-fetching them.
+    """
+
+    def __init__(
+        self,
+        searcher,
+        ttl: float = 3600.0,
+        max_entries: int = 1000,
+        path: Optional[str] = None
+    ):
+        self.searcher = searcher
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[CacheKey, Tuple[float, List[Dict[str, str]]]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+        self.store = SqliteResultStore(path) if path else None
+        if self.store is not None:
+            pruned = self.store.prune(ttl)
+            logger.info(f"Search result cache at {path} ({pruned} expired entries pruned)")
+        self.hits = 0
+        self.store_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, searcher) -> "CachedSearcher":
+        """SEARCH_CACHE_TTL, SEARCH_CACHE_SIZE and SEARCH_CACHE_PATH (unset keeps it in memory)"""
+        return cls(
+            searcher,
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", 3600)),
+            max_entries=int(os.getenv("SEARCH_CACHE_SIZE", 1000)),
+            path=os.getenv("SEARCH_CACHE_PATH") or None
+        )
+
+    def _remember(self, key: CacheKey, stored_at: float, results: List[Dict[str, str]]):
+        self._memory[key] = (stored_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def search(self, query: str, num_results: int = 10) -> List[Dict[str, str]]:
+        key = (normalize_query(query), num_results)
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            if time.time() - cached[0] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            del self._memory[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = self._inflight[key] = asyncio.create_task(self._load(key, query, num_results))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # One caller giving up must not cancel the search the others are waiting on
+        return await asyncio.shield(task)
+
+    async def _load(self, key: CacheKey, query: str, num_results: int) -> List[Dict[str, str]]:
+        if self.store is not None:
+            stored = await asyncio.to_thread(self.store.get, key, self.ttl)
+            if stored is not None:
+                self.store_hits += 1
+                self._remember(key, *stored)
+                return stored[1]
+
+        self.misses += 1
+        results = await self.searcher.search(query, num_results)
+        # Some pages failed upstream: return them to this caller only
+        if results and not getattr(results, "partial", False):
+            self._remember(key, time.time(), results)
+            if self.store is not None:
+                try:
+                    await asyncio.to_thread(self.store.put, key, results)
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not persist search results: {e}")
+        return results
+
+    async def aclose(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self.store is not None:
+            self.store.close()
+        close = getattr(self.searcher, "aclose", None)
+        if close is not None:
+            await close()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.store_hits + self.coalesced + self.misses
+        stats = {
+            "entries": len(self._memory),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            # Share of calls that didn't trigger an upstream search
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            "persistent": self.store is not None,
+        }
+        if hasattr(self.searcher, "stats"):
+            stats["searcher"] = self.searcher.stats()
+        return stats
@@ -256,7 +256,7 @@ class Searcher:
             logger.error(f"API search failed: {e}")
             return []
 
-Usage
+# Usage
 if __name__ == "__main__":
     searcher = Searcher()
     results = searcher.search("what is EBITA", 10)
@@ -3,6 +3,8 @@ from bs4 import BeautifulSoup
 import logging
 from typing import List, Dict
 
+from service.extract import DEFAULT_MAX_BYTES, DEFAULT_MAX_CHARS, extract_from_chunks
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -93,17 +95,21 @@ class Search:
             logger.error(f"API search failed: {e}")
             return []
 
-    def get_page_content(self, url: str) -> str:
-        """Get page content with proper headers"""
+    def get_page_content(
+        self,
+        url: str,
+        max_chars: int = DEFAULT_MAX_CHARS,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> str:
+        """Get page content with proper headers, parsing incrementally as bytes arrive"""
         try:
-            response = self.session.get(url, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'footer']):
-                element.decompose()
-                
-            return soup.get_text(separator=' ', strip=True)
+            with self.session.get(url, timeout=10, stream=True) as response:
+                return extract_from_chunks(
+                    response.iter_content(chunk_size=16384),
+                    encoding=response.encoding,
+                    max_chars=max_chars,
+                    max_bytes=max_bytes
+                )
             
         except Exception as e:
             logger.error(f"Content fetch failed: {e}")
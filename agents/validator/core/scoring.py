@@ -1,10 +1,20 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from datetime import datetime, timedelta
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+from scipy.sparse import csr_matrix, diags
+
+
+UNCERTAINTY_PHRASES = [
+    "i don't know", "not sure", "unclear", "might be", 
+    "possibly", "perhaps", "i think", "seems like"
+]
+
+# Recency buckets shared by calculate_recency_score and recency_scores: (max days old, score)
+RECENCY_BUCKETS = [(1, 1.0), (7, 0.9), (30, 0.8), (90, 0.7), (365, 0.6)]
 
 
 def cosine_sim(text1: str, text2: str) -> float:
@@ -21,11 +31,79 @@ def cosine_sim(text1: str, text2: str) -> float:
     except:
         return 0.0
 
+class TfidfScorer:
+    """
+    Reusable TF-IDF scorer.
+
+    Fit it once on a corpus (or load a persisted vocabulary/IDF table) and
+    score a query against many texts with a single sparse matrix product,
+    instead of fitting a new vectorizer for every pair of strings.
+    """
+
+    def __init__(self, vocabulary: Optional[Dict[str, int]] = None, idf: Optional[np.ndarray] = None):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self._counter = None
+        if vocabulary is not None:
+            self._counter = CountVectorizer(lowercase=True, vocabulary=vocabulary)
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._counter is not None
+
+    @classmethod
+    def fit(cls, corpus: List[str]) -> "TfidfScorer":
+        """Fit vocabulary and smoothed IDF weights (same formula as TfidfVectorizer)"""
+        docs = [doc for doc in corpus if doc]
+        try:
+            counter = CountVectorizer(stop_words='english', lowercase=True)
+            counts = counter.fit_transform(docs)
+        except ValueError:
+            # Empty corpus or only stop words - nothing to score against
+            return cls(vocabulary={}, idf=np.zeros(0))
+
+        n_docs = counts.shape[0]
+        doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+        idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1.0
+        return cls(vocabulary=counter.vocabulary_, idf=idf)
+
+    def save(self, path: str) -> None:
+        """Persist the vocabulary/IDF table so other processes can skip fitting"""
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez(path, terms=np.array(terms, dtype=str), idf=self.idf)
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfScorer":
+        """Load a vocabulary/IDF table written by save()"""
+        data = np.load(path, allow_pickle=False)
+        terms = data["terms"].tolist()
+        return cls(vocabulary={term: i for i, term in enumerate(terms)}, idf=data["idf"])
+
+    def transform(self, texts: List[str]) -> csr_matrix:
+        """L2-normalised TF-IDF rows for texts (empty texts give zero rows)"""
+        if not self.vocabulary:
+            return csr_matrix((len(texts), 0))
+        counts = self._counter.transform([text or "" for text in texts])
+        return normalize(counts @ diags(self.idf), norm='l2', copy=False).tocsr()
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        """Cosine similarity between query and every text, in one product"""
+        if not texts:
+            return np.zeros(0)
+        if not query:
+            return np.zeros(len(texts))
+
+        matrix = self.transform([query, *texts])
+        if matrix.shape[1] == 0:
+            return np.zeros(len(texts))
+        return (matrix[1:] @ matrix[0].T).toarray().ravel()
+
 def score_rag_response(
     rag_response: str, 
     query: str, 
     rag_confidence: Optional[float] = None,
-    response_length_penalty: bool = True
+    response_length_penalty: bool = True,
+    scorer: Optional[TfidfScorer] = None
 ) -> Dict:
     """Score RAG response based on multiple factors"""
     
@@ -37,17 +115,16 @@ def score_rag_response(
         base_score = 0.6
     
     # Content relevance to query
-    relevance_score = cosine_sim(rag_response, query)
+    if scorer is not None and scorer.is_fitted:
+        relevance_score = float(scorer.score(query, [rag_response])[0])
+    else:
+        relevance_score = cosine_sim(rag_response, query)
     
     # Response completeness (length and structure indicators)
     completeness_score = min(len(rag_response) / 500, 1.0)  # Normalize to 0-1
     
     # Check for uncertainty indicators
-    uncertainty_phrases = [
-        "i don't know", "not sure", "unclear", "might be", 
-        "possibly", "perhaps", "i think", "seems like"
-    ]
-    uncertainty_penalty = sum(1 for phrase in uncertainty_phrases 
+    uncertainty_penalty = sum(1 for phrase in UNCERTAINTY_PHRASES 
                              if phrase in rag_response.lower()) * 0.1
     
     # Combine scores
@@ -66,13 +143,27 @@ def score_rag_response(
         "uncertainty_penalty": uncertainty_penalty
     }
 
-def score_web_results(web_results: List[Dict], query: str) -> Dict:
+def score_web_results(
+    web_results: List[Dict],
+    query: str,
+    scorer: Optional[TfidfScorer] = None
+) -> Dict:
     """Score web search results based on multiple factors"""
     
     if not web_results:
         return {"score": 0.0, "details": [], "best_result": None}
     
     result_scores = []
+
+    titles = [result.get('title', '') for result in web_results]
+    snippets = [result.get('snippet', '') for result in web_results]
+    if scorer is None or not scorer.is_fitted:
+        scorer = TfidfScorer.fit([query, *titles, *snippets])
+
+    # All titles and snippets against the query in a single product
+    relevances = scorer.score(query, titles + snippets)
+    title_relevances = relevances[:len(web_results)]
+    snippet_relevances = relevances[len(web_results):]
     
     for i, result in enumerate(web_results):
         # Extract result fields safely
@@ -82,8 +173,8 @@ def score_web_results(web_results: List[Dict], query: str) -> Dict:
         published_date = result.get('published_date', '')
         
         # Content relevance
-        title_relevance = cosine_sim(title, query)
-        snippet_relevance = cosine_sim(snippet, query)
+        title_relevance = float(title_relevances[i])
+        snippet_relevance = float(snippet_relevances[i])
         content_relevance = 0.6 * title_relevance + 0.4 * snippet_relevance
         
         # Recency score (prefer recent content for time-sensitive queries)
@@ -120,29 +211,32 @@ def score_web_results(web_results: List[Dict], query: str) -> Dict:
 
 def calculate_recency_score(published_date: str) -> float:
     """Calculate recency score based on publication date"""
-    if not published_date:
+    days_old = _days_old(published_date, datetime.now())
+    if np.isnan(days_old):
         return 0.5  # Neutral score for unknown dates
-    
+
+    # Newer is better, but not critical beyond 30 days
+    for limit, score in RECENCY_BUCKETS:
+        if days_old <= limit:
+            return score
+    return 0.5
+
+def _days_old(published_date: str, now: datetime) -> float:
+    """Age in days of a '%Y-%m-%d' date, NaN when missing or unparseable"""
+    if not published_date:
+        return np.nan
     try:
-        # Try to parse date (adjust format as needed)
-        pub_date = datetime.strptime(published_date, '%Y-%m-%d')
-        days_old = (datetime.now() - pub_date).days
-        
-        # Scoring logic: newer is better, but not critical beyond 30 days
-        if days_old <= 1:
-            return 1.0
-        elif days_old <= 7:
-            return 0.9
-        elif days_old <= 30:
-            return 0.8
-        elif days_old <= 90:
-            return 0.7
-        elif days_old <= 365:
-            return 0.6
-        else:
-            return 0.5
-    except:
-        return 0.5
+        return float((now - datetime.strptime(published_date, '%Y-%m-%d')).days)
+    except (TypeError, ValueError):
+        return np.nan
+
+def recency_scores(published_dates: List[str]) -> np.ndarray:
+    """Vectorised calculate_recency_score over many publication dates"""
+    now = datetime.now()
+    days_old = np.array([_days_old(date, now) for date in published_dates], dtype=float)
+    known = ~np.isnan(days_old)
+    conditions = [known & (days_old <= limit) for limit, _ in RECENCY_BUCKETS]
+    return np.select(conditions, [score for _, score in RECENCY_BUCKETS], default=0.5)
 
 def summarize_web_results(web_results: List[Dict], top_n: int = 3) -> str:
     """Create a summary from top web results"""
@@ -164,7 +258,8 @@ def validate_responses(
     rag_response: str,
     web_results: List[Dict],
     query: str,
-    rag_confidence: Optional[float] = None
+    rag_confidence: Optional[float] = None,
+    scorer: Optional[TfidfScorer] = None
 ) -> Dict:
     """
     Enhanced validation comparing RAG vs Web results
@@ -174,14 +269,24 @@ def validate_responses(
         web_results: List of web search results
         query: Original user query
         rag_confidence: Optional confidence score from RAG system
+        scorer: Optional pre-fitted TfidfScorer; when omitted one is fitted
+            once on the query, RAG answer and web results
     
     Returns:
         Dictionary with best_source, rag_score, web_score, and selected_answer
     """
     
+    if scorer is None or not scorer.is_fitted:
+        scorer = TfidfScorer.fit([
+            query,
+            rag_response,
+            *(result.get('title', '') for result in web_results),
+            *(result.get('snippet', '') for result in web_results)
+        ])
+
     # Score both sources
-    rag_analysis = score_rag_response(rag_response, query, rag_confidence)
-    web_analysis = score_web_results(web_results, query)
+    rag_analysis = score_rag_response(rag_response, query, rag_confidence, scorer=scorer)
+    web_analysis = score_web_results(web_results, query, scorer)
     
     rag_score = rag_analysis["score"]
     best_web_score = web_analysis["score"]
@@ -198,6 +303,104 @@ def validate_responses(
         )
     }
 
+def validate_batch(
+    triples: List[Tuple[str, str, List[Dict]]],
+    rag_confidences: Optional[List[Optional[float]]] = None,
+    scorer: Optional[TfidfScorer] = None
+) -> List[Dict]:
+    """
+    Validate many (query, rag_response, web_results) triples in one vectorised pass
+
+    All queries, RAG answers, titles and snippets are stacked into a single
+    TF-IDF matrix and every relevance, recency and position score is computed
+    as a NumPy array. Without a pre-fitted scorer one is fitted on the whole
+    batch, so IDF weights (and therefore scores) can differ slightly from
+    per-query validate_responses calls.
+
+    Returns:
+        One dictionary per triple with best_source, rag_score, web_score,
+        and selected_answer
+    """
+    if not triples:
+        return []
+
+    n_queries = len(triples)
+    queries = [query or "" for query, _, _ in triples]
+    rag_responses = [rag_response or "" for _, rag_response, _ in triples]
+    web_lists = [web_results or [] for _, _, web_results in triples]
+    if rag_confidences is None:
+        rag_confidences = [None] * n_queries
+
+    # Flatten web results, remembering which query and position each came from
+    web_counts = np.array([len(web_results) for web_results in web_lists], dtype=int)
+    owners = np.repeat(np.arange(n_queries), web_counts)
+    positions = np.concatenate([np.arange(count) for count in web_counts]) if owners.size else np.zeros(0)
+    flat_results = [result for web_results in web_lists for result in web_results]
+    titles = [result.get('title', '') for result in flat_results]
+    snippets = [result.get('snippet', '') for result in flat_results]
+    n_web = len(flat_results)
+
+    texts = queries + rag_responses + titles + snippets
+    if scorer is None or not scorer.is_fitted:
+        scorer = TfidfScorer.fit(texts)
+    matrix = scorer.transform(texts)
+
+    query_rows = matrix[:n_queries]
+    rag_rows = matrix[n_queries:2 * n_queries]
+    title_rows = matrix[2 * n_queries:2 * n_queries + n_web]
+    snippet_rows = matrix[2 * n_queries + n_web:]
+
+    def row_cosine(rows, owner_index):
+        if rows.shape[0] == 0 or rows.shape[1] == 0:
+            return np.zeros(rows.shape[0])
+        return np.asarray(rows.multiply(query_rows[owner_index]).sum(axis=1)).ravel()
+
+    # RAG scores
+    base_scores = np.array(
+        [0.6 if confidence is None else confidence for confidence in rag_confidences],
+        dtype=float
+    )
+    rag_relevance = row_cosine(rag_rows, np.arange(n_queries))
+    completeness = np.minimum(np.array([len(text) for text in rag_responses]) / 500, 1.0)
+    uncertainty = np.array([
+        sum(1 for phrase in UNCERTAINTY_PHRASES if phrase in text.lower())
+        for text in rag_responses
+    ]) * 0.1
+    rag_scores = np.minimum(
+        0.4 * base_scores
+        + 0.3 * rag_relevance
+        + 0.2 * completeness
+        + 0.1 * (1.0 - np.minimum(uncertainty, 0.5)),
+        1.0
+    )
+
+    # Web scores
+    content_relevance = 0.6 * row_cosine(title_rows, owners) + 0.4 * row_cosine(snippet_rows, owners)
+    recency = recency_scores([result.get('published_date', '') for result in flat_results])
+    position_penalty = np.maximum(0.9 - positions * 0.1, 0.5)
+    result_scores = 0.6 * content_relevance + 0.3 * recency + 0.1 * position_penalty
+
+    web_scores = np.zeros(n_queries)
+    if n_web:
+        has_results = web_counts > 0
+        starts = np.concatenate([[0], np.cumsum(web_counts)[:-1]])
+        web_scores[has_results] = np.maximum.reduceat(result_scores, starts[has_results])
+
+    decisions = []
+    for i in range(n_queries):
+        web_wins = web_scores[i] > rag_scores[i]
+        decisions.append({
+            "best_source": "web" if web_wins else "rag",
+            "rag_score": float(rag_scores[i]),
+            "web_score": float(web_scores[i]),
+            "selected_answer": (
+                summarize_web_results(web_lists[i])
+                if web_wins
+                else triples[i][1]
+            )
+        })
+    return decisions
+
 def generate_recommendation(rag_score: float, web_score: float, flags: List[str]) -> str:
     """Generate human-readable recommendation"""
     if "no_web_results" in flags:
@@ -0,0 +1,64 @@
+import logging
+import os
+import sys
+
+import grpc
+
+# Generated stubs and proto converters live under shared/ at the repository root
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from core.scoring import validate_responses
+from shared.protos.compiled import validator_pb2_grpc
+from shared.utils.protobuf import validation_arguments, validation_output
+
+try:
+    from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+    HEALTH_PROTOCOL_AVAILABLE = True
+except ImportError:
+    HEALTH_PROTOCOL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ValidatorAgentServicer(validator_pb2_grpc.ValidatorAgentServicer):
+    """gRPC front end for validate_responses, sharing the HTTP service's scorer"""
+
+    def __init__(self, scorer=None):
+        self.scorer = scorer
+
+    def _validate(self, request):
+        return validation_output(
+            validate_responses(**validation_arguments(request), scorer=self.scorer)
+        )
+
+    async def Validate(self, request, context):
+        try:
+            return self._validate(request)
+        except Exception as e:
+            logger.error(f"Validation error: {str(e)}")
+            await context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+    async def ValidateStream(self, request_iterator, context):
+        async for request in request_iterator:
+            try:
+                yield self._validate(request)
+            except Exception as e:
+                logger.error(f"Validation error: {str(e)}")
+                await context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+
+async def serve(port: int, scorer=None) -> grpc.aio.Server:
+    """Start the validator gRPC server on port; the caller stops it"""
+    server = grpc.aio.server()
+    validator_pb2_grpc.add_ValidatorAgentServicer_to_server(ValidatorAgentServicer(scorer), server)
+    if HEALTH_PROTOCOL_AVAILABLE:
+        # Lets the gateway's router health-check replicas with the standard protocol
+        health_servicer = health.aio.HealthServicer()
+        await health_servicer.set("", health_pb2.HealthCheckResponse.SERVING)
+        health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
+    server.add_insecure_port(f"0.0.0.0:{port}")
+    await server.start()
+    logger.info(f"Validator gRPC server listening on port {port}")
+    return server
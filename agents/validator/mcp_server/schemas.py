@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+class WebResult(BaseModel):
+    title: str = ""
+    snippet: str = ""
+    url: str = ""
+    published_date: str = ""
+
+class ValidationRequest(BaseModel):
+    query: str
+    rag_response: str
+    web_results: List[WebResult] = []
+    rag_confidence: Optional[float] = None
+
+class ValidationResponse(BaseModel):
+    best_source: str
+    rag_score: float
+    web_score: float
+    selected_answer: str
+
+class BatchValidationRequest(BaseModel):
+    items: List[ValidationRequest]
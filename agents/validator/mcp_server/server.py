@@ -0,0 +1,98 @@
+from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from typing import List
+import logging
+import os
+import sys
+from dotenv import load_dotenv
+load_dotenv()
+
+VALIDATOR_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, VALIDATOR_ROOT)
+
+from core.scoring import TfidfScorer, validate_batch, validate_responses
+from mcp_server.schemas import (
+    BatchValidationRequest,
+    ValidationRequest,
+    ValidationResponse
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Optional corpus-fitted vocabulary/IDF table (TfidfScorer.save); without it
+# each validation fits its own scorer on the texts being compared
+VALIDATOR_IDF_PATH = os.getenv("VALIDATOR_IDF_PATH")
+scorer = TfidfScorer.load(VALIDATOR_IDF_PATH) if VALIDATOR_IDF_PATH else None
+
+# gRPC transport alongside HTTP, enabled by setting a port
+GRPC_PORT = int(os.getenv("GRPC_PORT", 0))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    grpc_server = None
+    if GRPC_PORT:
+        from mcp_server.grpc_server import serve
+        grpc_server = await serve(GRPC_PORT, scorer)
+    yield
+    if grpc_server is not None:
+        await grpc_server.stop(grace=5)
+
+app = FastAPI(title="Validator Agent", lifespan=lifespan)
+
+
+@app.post("/validate")
+async def validate(request: ValidationRequest) -> ValidationResponse:
+    """Score the RAG answer against web results and pick the better source"""
+    try:
+        result = validate_responses(
+            request.rag_response,
+            [web_result.model_dump() for web_result in request.web_results],
+            request.query,
+            rag_confidence=request.rag_confidence,
+            scorer=scorer
+        )
+        return ValidationResponse(**result)
+    except Exception as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/validate/batch")
+async def validate_many(request: BatchValidationRequest) -> List[ValidationResponse]:
+    """Vectorised validation of many requests (used for threshold recalibration)"""
+    try:
+        results = validate_batch(
+            [
+                (
+                    item.query,
+                    item.rag_response,
+                    [web_result.model_dump() for web_result in item.web_results]
+                )
+                for item in request.items
+            ],
+            rag_confidences=[item.rag_confidence for item in request.items],
+            scorer=scorer
+        )
+        return [ValidationResponse(**result) for result in results]
+    except Exception as e:
+        logger.error(f"Batch validation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "service": "validator",
+        "corpus_scorer": scorer is not None,
+        "grpc_port": GRPC_PORT or None
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8082)))
@@ -0,0 +1,125 @@
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import grpc
+
+from hedging import DEADLINE_HEADER, Deadline, DeadlineExceeded
+
+# Generated stubs and proto converters live under shared/ at the repository root
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from shared.protos.compiled import searcher_pb2, searcher_pb2_grpc, validator_pb2_grpc
+from shared.utils.protobuf import validation_input, validation_result
+
+logger = logging.getLogger(__name__)
+
+# Keep idle HTTP/2 connections alive so calls never pay for a new handshake
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+
+class GrpcBackend:
+    """One persistent channel to an agent's gRPC server, with call counters"""
+
+    def __init__(self, name: str, target: str, stub_cls):
+        self.name = name
+        self.target = target
+        self.stub_cls = stub_cls
+        self.channel: Optional[grpc.aio.Channel] = None
+        self.stub = None
+        self.requests_total = 0
+        self.errors_total = 0
+        self.total_latency = 0.0
+
+    async def start(self):
+        self.channel = grpc.aio.insecure_channel(self.target, options=CHANNEL_OPTIONS)
+        self.stub = self.stub_cls(self.channel)
+
+    async def close(self):
+        if self.channel is not None:
+            await self.channel.close()
+            self.channel = None
+
+    async def call(self, method: str, request, deadline: Deadline):
+        """Unary call bounded by deadline; gRPC propagates the deadline to the server itself"""
+        if deadline.expired:
+            raise DeadlineExceeded(f"Deadline exceeded before calling {self.name}")
+        self.requests_total += 1
+        start = time.perf_counter()
+        try:
+            return await getattr(self.stub, method)(
+                request,
+                timeout=deadline.remaining(),
+                metadata=((DEADLINE_HEADER.lower(), deadline.header_value()),)
+            )
+        except grpc.aio.AioRpcError as e:
+            self.errors_total += 1
+            if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+                raise DeadlineExceeded(f"Deadline exceeded waiting for {self.name}") from e
+            raise
+        finally:
+            self.total_latency += time.perf_counter() - start
+
+    def stats(self) -> Dict:
+        return {
+            "target": self.target,
+            "state": str(self.channel.get_state()) if self.channel is not None else "closed",
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "avg_latency_ms": (
+                1000 * self.total_latency / self.requests_total if self.requests_total else 0.0
+            ),
+        }
+
+
+class GrpcAgents:
+    """gRPC transport to the searcher and validator; either may be left on HTTP"""
+
+    def __init__(self, searcher_target: Optional[str] = None, validator_target: Optional[str] = None):
+        self.searcher = (
+            GrpcBackend("searcher", searcher_target, searcher_pb2_grpc.SearcherAgentStub)
+            if searcher_target else None
+        )
+        self.validator = (
+            GrpcBackend("validator", validator_target, validator_pb2_grpc.ValidatorAgentStub)
+            if validator_target else None
+        )
+
+    @property
+    def backends(self) -> List[GrpcBackend]:
+        return [backend for backend in (self.searcher, self.validator) if backend is not None]
+
+    async def start(self):
+        for backend in self.backends:
+            await backend.start()
+
+    async def close(self):
+        for backend in self.backends:
+            await backend.close()
+
+    async def search(self, query: str, num_results: int, deadline: Deadline) -> List[Dict[str, str]]:
+        response = await self.searcher.call(
+            "Search", searcher_pb2.SearchRequest(user_q=query, num_results=num_results), deadline
+        )
+        return [
+            {"title": result.title, "snippet": result.snippet, "url": result.link}
+            for result in response.results
+        ]
+
+    async def validate(self, query: str, rag_answer: str, web_results: list, deadline: Deadline) -> Dict:
+        response = await self.validator.call(
+            "Validate", validation_input(query, rag_answer, web_results), deadline
+        )
+        return validation_result(response)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {backend.name: backend.stats() for backend in self.backends}
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Remaining time budget in milliseconds, relative so clock skew between services doesn't matter
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    pass
+
+
+class Deadline:
+    """Absolute point in (monotonic) time by which a request must finish"""
+
+    def __init__(self, timeout: float):
+        self.expires_at = time.monotonic() + timeout
+
+    @classmethod
+    def from_header(cls, value: Optional[str], default_timeout: float) -> "Deadline":
+        """Use the caller's budget when it is tighter than our own default"""
+        timeout = default_timeout
+        if value:
+            try:
+                timeout = min(timeout, max(int(value), 0) / 1000)
+            except ValueError:
+                logger.warning(f"Ignoring malformed {DEADLINE_HEADER} header: {value!r}")
+        return cls(timeout)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def header_value(self) -> str:
+        return str(int(self.remaining() * 1000))
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies, used to pick the hedge delay"""
+
+    def __init__(
+        self,
+        window: int = 1000,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.05
+    ):
+        self.samples = deque(maxlen=window)
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self._cached_delay: Optional[float] = None
+        self._since_refresh = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self._since_refresh += 1
+        # Re-sorting on every request is wasteful; refresh the quantile periodically
+        if self._since_refresh >= 20:
+            self._cached_delay = None
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self) -> float:
+        if len(self.samples) < self.min_samples:
+            return self.initial_delay
+        if self._cached_delay is None:
+            self._cached_delay = max(self.percentile(self.quantile), self.min_delay)
+            self._since_refresh = 0
+        return self._cached_delay
+
+    def stats(self) -> dict:
+        p50, p95, p99 = (self.percentile(q) for q in (0.5, 0.95, 0.99))
+        return {
+            "samples": len(self.samples),
+            "p50_ms": 1000 * p50 if p50 is not None else None,
+            "p95_ms": 1000 * p95 if p95 is not None else None,
+            "p99_ms": 1000 * p99 if p99 is not None else None,
+            "hedge_delay_ms": 1000 * self.hedge_delay(),
+        }
+
+
+async def hedged_request(backend, method: str, path: str, deadline: Deadline, **kwargs) -> httpx.Response:
+    """
+    Send a request within deadline; if it is still running after the backend's
+    observed p95, send one duplicate and return whichever succeeds first.
+    The loser is cancelled. 5xx responses count as failures so a healthy
+    duplicate can still win.
+    """
+    if deadline.expired:
+        raise DeadlineExceeded(f"Deadline exceeded before calling {backend.config.name}")
+
+    headers = dict(kwargs.pop("headers", None) or {})
+
+    async def attempt() -> httpx.Response:
+        headers[DEADLINE_HEADER] = deadline.header_value()
+        # The deadline only tightens the backend's own read/connect timeouts
+        remaining = deadline.remaining()
+        timeout = httpx.Timeout(
+            min(backend.config.timeout, remaining),
+            connect=min(backend.config.connect_timeout, remaining)
+        )
+        response = await backend.request(method, path, headers=headers, timeout=timeout, **kwargs)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response
+
+    primary = asyncio.create_task(attempt())
+    tasks = {primary}
+    hedge = None
+    try:
+        if backend.config.hedge:
+            delay = min(backend.latency.hedge_delay(), deadline.remaining())
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and not deadline.expired:
+                hedge = asyncio.create_task(attempt())
+                tasks.add(hedge)
+                backend.hedges_sent += 1
+
+        last_error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(
+                tasks, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise DeadlineExceeded(f"Deadline exceeded waiting for {backend.config.name}")
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        backend.hedges_won += 1
+                    return task.result()
+                last_error = task.exception()
+        raise last_error
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,184 @@
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from hedging import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class BackendConfig:
+    """Connection settings for one downstream service"""
+    name: str
+    base_url: str
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    # Send a duplicate request when the first runs past the observed p95 (idempotent calls only)
+    hedge: bool = False
+    hedge_initial_delay: float = 1.0
+
+    @classmethod
+    def from_env(
+        cls,
+        name: str,
+        base_url: str,
+        timeout: float,
+        http2: bool = False,
+        hedge: bool = False
+    ) -> "BackendConfig":
+        """Read overrides from <NAME>_URL, <NAME>_TIMEOUT, <NAME>_MAX_CONNECTIONS, ..."""
+        prefix = name.upper()
+        return cls(
+            name=name,
+            base_url=os.getenv(f"{prefix}_URL", base_url),
+            timeout=float(os.getenv(f"{prefix}_TIMEOUT", timeout)),
+            connect_timeout=float(os.getenv(f"{prefix}_CONNECT_TIMEOUT", 5.0)),
+            max_connections=int(os.getenv(f"{prefix}_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.getenv(f"{prefix}_MAX_KEEPALIVE", 20)),
+            keepalive_expiry=float(os.getenv(f"{prefix}_KEEPALIVE_EXPIRY", 30.0)),
+            http2=os.getenv(f"{prefix}_HTTP2", str(http2)).lower() in ("1", "true", "yes"),
+            hedge=os.getenv(f"{prefix}_HEDGE", str(hedge)).lower() in ("1", "true", "yes"),
+            hedge_initial_delay=float(os.getenv(f"{prefix}_HEDGE_INITIAL_DELAY", 1.0)),
+        )
+
+
+class BackendClient:
+    """Long-lived pooled httpx client for a single backend, with request counters"""
+
+    def __init__(self, config: BackendConfig):
+        self.config = config
+        self.client: Optional[httpx.AsyncClient] = None
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self.total_latency = 0.0
+        self.latency = LatencyTracker(initial_delay=config.hedge_initial_delay)
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    async def start(self):
+        http2 = self.config.http2 and HTTP2_AVAILABLE
+        if self.config.http2 and not HTTP2_AVAILABLE:
+            logger.warning(f"HTTP/2 requested for {self.config.name} but 'h2' is not installed, using HTTP/1.1")
+
+        self.client = httpx.AsyncClient(
+            base_url=self.config.base_url,
+            timeout=httpx.Timeout(self.config.timeout, connect=self.config.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            http2=http2,
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        if self.client is None:
+            raise RuntimeError(f"HTTP client for '{self.config.name}' is not started")
+
+        self.requests_total += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+            if response.status_code < 500:
+                self.latency.record(time.perf_counter() - start)
+            return response
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_latency += time.perf_counter() - start
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Streaming request; the body is read by the caller, not buffered here"""
+        if self.client is None:
+            raise RuntimeError(f"HTTP client for '{self.config.name}' is not started")
+
+        self.requests_total += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            async with self.client.stream(method, path, **kwargs) as response:
+                yield response
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_latency += time.perf_counter() - start
+
+    def stats(self) -> Dict:
+        stats = {
+            "base_url": self.config.base_url,
+            "http2": self.config.http2 and HTTP2_AVAILABLE,
+            "max_connections": self.config.max_connections,
+            "max_keepalive_connections": self.config.max_keepalive_connections,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "in_flight": self.in_flight,
+            "avg_latency_ms": (
+                1000 * self.total_latency / self.requests_total if self.requests_total else 0.0
+            ),
+            "latency": self.latency.stats(),
+            "hedging": self.config.hedge,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+        }
+
+        # httpx does not expose pool state publicly; read it from httpcore when present
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            stats["connections_open"] = len(connections)
+            stats["connections_idle"] = sum(1 for conn in connections if conn.is_idle())
+        return stats
+
+
+class ClientPool:
+    """One BackendClient per downstream service, opened and closed with the app lifespan"""
+
+    def __init__(self, configs):
+        self.backends: Dict[str, BackendClient] = {
+            config.name: BackendClient(config) for config in configs
+        }
+
+    async def start(self):
+        for backend in self.backends.values():
+            await backend.start()
+
+    async def close(self):
+        for backend in self.backends.values():
+            await backend.close()
+
+    def __getitem__(self, name: str) -> BackendClient:
+        return self.backends[name]
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: backend.stats() for name, backend in self.backends.items()}
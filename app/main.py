@@ -1,11 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
+import json
 import httpx 
 from typing import Optional
 import os
+from contextlib import asynccontextmanager
 from schemas import ProcessRequest,ProcessResponse, RouteDecision
 from fastapi.encoders import jsonable_encoder
+from http_clients import BackendConfig, ClientPool
+from hedging import DEADLINE_HEADER, Deadline, hedged_request
 
 
 # config = {
@@ -30,10 +36,65 @@ logger = logging.getLogger(__name__)
 # retriever = PineconeRetriever()
 # rag_chain = RAGChain(retriever)
 
+# One pooled, keep-alive client per downstream service (see http_clients.py)
+clients = ClientPool([
+    BackendConfig.from_env(
+        "rag",
+        base_url="https://rag-service-1053292367606.us-central1.run.app",
+        timeout=10.0,
+        http2=True,
+        hedge=True  # /retrieve is read-only, so duplicates are safe
+    ),
+    BackendConfig.from_env(
+        "mcp",
+        base_url="http://0.0.0.0:8000",
+        timeout=30.0
+    ),
+    BackendConfig.from_env(
+        "searcher",
+        base_url="http://0.0.0.0:8000",
+        timeout=10.0
+    ),
+    BackendConfig.from_env(
+        "validator",
+        base_url="http://0.0.0.0:8082",
+        timeout=5.0
+    ),
+])
+
+# Searcher/validator over gRPC (host:port) instead of JSON over HTTP when set;
+# needs the stubs generated by compile_protos.py
+SEARCHER_GRPC_TARGET = os.getenv("SEARCHER_GRPC_TARGET")
+VALIDATOR_GRPC_TARGET = os.getenv("VALIDATOR_GRPC_TARGET")
+grpc_agents = None
+if SEARCHER_GRPC_TARGET or VALIDATOR_GRPC_TARGET:
+    from grpc_clients import GrpcAgents
+    grpc_agents = GrpcAgents(SEARCHER_GRPC_TARGET, VALIDATOR_GRPC_TARGET)
+
+# Route used when the request doesn't imply one: rag, mcp or hybrid (hybrid also
+# needs the searcher and validator URLs to point at running services)
+DEFAULT_ROUTE = RouteDecision(os.getenv("DEFAULT_ROUTE", RouteDecision.RAG.value))
+HYBRID_NUM_RESULTS = int(os.getenv("HYBRID_NUM_RESULTS", 5))
+
+# Overall budget for one /process call unless the caller sends a tighter one
+PROCESS_DEADLINE = float(os.getenv("PROCESS_DEADLINE", 30.0))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open downstream connection pools on startup and close them on shutdown"""
+    await clients.start()
+    if grpc_agents is not None:
+        await grpc_agents.start()
+    yield
+    if grpc_agents is not None:
+        await grpc_agents.close()
+    await clients.close()
+
 app = FastAPI(
     title="Credit Analyst RAG Service",
     description="LangChain processing endpoint for credit analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS Configuration (adjust for production)
@@ -45,7 +106,10 @@ app.add_middleware(
 )
 
 @app.post("/process")
-async def process_request(request: ProcessRequest):
+async def process_request(
+    request: ProcessRequest,
+    request_timeout_ms: Optional[str] = Header(None, alias=DEADLINE_HEADER)
+):
     """
     Process credit analysis request through RAG pipeline
     
@@ -56,20 +120,18 @@ async def process_request(request: ProcessRequest):
     - entity: Analyst level ('Associate', 'VP', etc.) (optional)
     - concept: Key concepts involved (optional)
     """
+    deadline = Deadline.from_header(request_timeout_ms, PROCESS_DEADLINE)
     try:
-        route = "rag"
-
-        #this will determine where to route 
-        #route = await determine_routing(request)
+        route = await determine_routing(request)
         request_dict = jsonable_encoder(request)
-        logging.info(f"Processing request: {request_dict}")
-           
-        if route == "rag":
-            print("its rag")
-            rag_response = await call_rag_system(request_dict)
+        logging.info(f"Processing request ({route.value}): {request_dict}")
+
+        if route == RouteDecision.HYBRID:
+            return await call_hybrid(request_dict, deadline)
         elif route == RouteDecision.MCP:
-            print("its mcp")
-            rag_response = await call_mcp_system(request_dict)
+            return await call_mcp_system(request_dict, deadline)
+        elif route == RouteDecision.RAG:
+            rag_response = await call_rag_system(request_dict, deadline)
         else:
             rag_response = await generate_direct_response(request_dict)
 
@@ -79,8 +141,7 @@ async def process_request(request: ProcessRequest):
             "sources": rag_response["sources"],
             "processed": False
         }
-                
-                
+
     except Exception as e:
         logging.error(f"Orchestration error: {str(e)}")
         raise HTTPException(
@@ -88,33 +149,134 @@ async def process_request(request: ProcessRequest):
             detail=str(e)
         )
 
-async def call_rag_system(query: dict):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://rag-service-1053292367606.us-central1.run.app/retrieve",
-            json=query,
-            timeout=10
-        )
+@app.post("/process/stream")
+async def process_stream(request: ProcessRequest):
+    """Relay the RAG service's server-sent events to the caller as they arrive"""
+    request_dict = jsonable_encoder(request)
+    logging.info(f"Processing streaming request: {request_dict}")
 
-        return response.json()
+    async def relay():
+        try:
+            async with clients["rag"].stream("POST", "/retrieve/stream", json=request_dict) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_raw():
+                    yield chunk
+        except Exception as e:
+            logging.error(f"Streaming orchestration error: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n".encode()
 
-async def call_mcp_system(query: dict):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "http://0.0.0.0:8000/process",
-            json=query,
-            timeout=30.0
-        )
-        return {
-            "source": "mcp",
-            "response": response,
-            "processed": True  # MCP typically returns final answers
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def determine_routing(request: ProcessRequest) -> RouteDecision:
+    return DEFAULT_ROUTE
+
+async def call_rag_system(query: dict, deadline: Optional[Deadline] = None):
+    backend = clients["rag"]
+    deadline = deadline or Deadline(backend.config.timeout)
+    response = await hedged_request(backend, "POST", "/retrieve", deadline, json=query)
+    return response.json()
+
+async def call_mcp_system(query: dict, deadline: Optional[Deadline] = None):
+    backend = clients["mcp"]
+    deadline = deadline or Deadline(backend.config.timeout)
+    response = await hedged_request(backend, "POST", "/process", deadline, json=query)
+    return {
+        "source": "mcp",
+        "response": response.json(),
+        "processed": True  # MCP typically returns final answers
+    }
+
+async def call_search(query: str, deadline: Optional[Deadline] = None):
+    backend = clients["searcher"]
+    deadline = deadline or Deadline(backend.config.timeout)
+    if grpc_agents is not None and grpc_agents.searcher is not None:
+        return await grpc_agents.search(query, HYBRID_NUM_RESULTS, deadline)
+    response = await hedged_request(
+        backend, "POST", "/tools/Searcher", deadline,
+        json={"user_q": query, "num_results": HYBRID_NUM_RESULTS}
+    )
+    response.raise_for_status()
+    # The searcher reports tool failures as a single {"title": "Error"} result
+    return [
+        {
+            "title": result.get("title", ""),
+            "snippet": result.get("snippet", ""),
+            "url": result.get("link", "")
         }
+        for result in response.json().get("results") or []
+        if result.get("title") != "Error"
+    ]
+
+async def call_validator(query: str, rag_answer: str, web_results: list, deadline: Optional[Deadline] = None):
+    backend = clients["validator"]
+    deadline = deadline or Deadline(backend.config.timeout)
+    if grpc_agents is not None and grpc_agents.validator is not None:
+        return await grpc_agents.validate(query, rag_answer, web_results, deadline)
+    response = await hedged_request(
+        backend, "POST", "/validate", deadline,
+        json={"query": query, "rag_response": rag_answer, "web_results": web_results}
+    )
+    response.raise_for_status()
+    return response.json()
+
+async def call_hybrid(query: dict, deadline: Deadline):
+    """
+    Run RAG and web search concurrently, then let the validator pick the
+    better answer. Latency is max(rag, search) + validation rather than the
+    sum; if search or validation fails the RAG answer is returned as is.
+    """
+    rag_result, web_results = await asyncio.gather(
+        call_rag_system(query, deadline),
+        call_search(query["user_q"], deadline),
+        return_exceptions=True
+    )
+    if isinstance(rag_result, BaseException):
+        raise rag_result
+
+    response = {
+        "source": "rag",
+        "answer": rag_result["answer"],
+        "sources": rag_result["sources"],
+        "rag_score": None,
+        "web_score": None,
+        "processed": False
+    }
+    if isinstance(web_results, BaseException):
+        logger.warning(f"Web search failed, answering from RAG only: {web_results}")
+        return response
+    if not web_results:
+        return response
+
+    try:
+        validation = await call_validator(query["user_q"], rag_result["answer"], web_results, deadline)
+    except Exception as e:
+        logger.warning(f"Validation failed, answering from RAG only: {e}")
+        return response
+
+    response["rag_score"] = validation["rag_score"]
+    response["web_score"] = validation["web_score"]
+    if validation["best_source"] == "web":
+        response["source"] = "web"
+        response["answer"] = validation["selected_answer"]
+        response["sources"] = [result["url"] for result in web_results]
+    return response
 
 
 async def generate_direct_response(query: ProcessResponse):
     pass
 
+@app.get("/metrics")
+async def metrics():
+    """Connection pool and request statistics per downstream service"""
+    return {
+        "http_pools": clients.stats(),
+        "grpc_channels": grpc_agents.stats() if grpc_agents is not None else {}
+    }
+
 # @app.get("/health")
 # async def health_check():
 #     """Service health check endpoint"""
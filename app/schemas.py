@@ -19,4 +19,5 @@ class ProcessResponse(BaseModel):
 class RouteDecision(Enum):
     RAG = "rag"
     MCP = "mcp"
+    HYBRID = "hybrid"
     DIRECT_RESPONSE = "direct_response"
\ No newline at end of file
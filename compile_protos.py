@@ -1,30 +1,35 @@
 import glob
+import os
 from grpc_tools import protoc
 
-protoc.main((
-    '',
-    '-I./mcp_gateway/protos',
-    '-I./agents/validator/mcp_server ',
-    '-I./agents/searcher/mcp_server ',
-    '--python_out=./shared/protos/compiled',
-    '--grpc_python_out=./shared/protos/compiled',
-    *glob.glob('./mcp_gateway/protos/*.proto')
-))
+# Generated modules import each other by bare name (e.g. `import mcp_core_pb2`),
+# so every proto directory is its own include root
+OUTPUT_DIR = './shared/protos/compiled'
+PROTO_DIRS = [
+    './mcp_gateway/protos',
+    './agents/searcher/mcp_server',
+    './agents/validator/mcp_server',
+]
 
-# import glob
-# from grpc_tools import protoc
+os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# # Compile main protos
-# protoc.main((
-#     '',
-#     '-I./mcp_gateway/protos',
-#     '-I./agents/validator/mcp_server',
-#     '-I./agents/searcher/mcp_server',
-#     '--python_out=./shared/protos/compiled',
-#     '--grpc_python_out=./shared/protos/compiled',
-#     *glob.glob('./mcp_gateway/protos/*.proto'),
-#     *glob.glob('./agents/**/mcp_server/*.proto', recursive=True)
-# ))
+result = protoc.main((
+    '',
+    *(f'-I{directory}' for directory in PROTO_DIRS),
+    # google/protobuf/*.proto ship with grpc_tools
+    f'-I{os.path.join(os.path.dirname(protoc.__file__), "_proto")}',
+    f'--python_out={OUTPUT_DIR}',
+    f'--grpc_python_out={OUTPUT_DIR}',
+    *(path for directory in PROTO_DIRS for path in glob.glob(f'{directory}/*.proto'))
+))
+if result != 0:
+    raise SystemExit(f'protoc failed with exit code {result}')
 
-# # Create __init__.py files
-# open('./shared/protos/compiled/__init__.py', 'a').close()
\ No newline at end of file
+# Make the generated modules importable as shared.protos.compiled.<name>_pb2
+with open(os.path.join(OUTPUT_DIR, '__init__.py'), 'w') as f:
+    f.write(
+        'import os\n'
+        'import sys\n\n'
+        '# grpc_tools emits bare imports between generated modules\n'
+        'sys.path.append(os.path.dirname(__file__))\n'
+    )
@@ -2,38 +2,62 @@ from fastmcp import FastMCP
 from fastapi import FastAPI, HTTPException
 import os
 import asyncio
-from typing import Dict, Any, Callable
+import random
+from typing import Dict, Any, Callable, List
 import httpx
+import inspect
+import sys
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 load_dotenv()
 
+# Generated gRPC stubs and proto converters live under shared/ at the repository root
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
 
-from schemas import ToolRegistrationRequest
+
+from schemas import BulkToolRegistrationRequest, ToolRegistrationRequest, ValidationProxyRequest
+from router import AgentRouter, NoAvailableEndpoint, REGISTRY_PATH
+from resilience import BulkheadFullError, CircuitOpenError, ResilienceConfig, ToolError, ToolGuard
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Auto-discover and register tools on startup"""
     print("MCP Server starting up...")
 
-    # Try to auto-discover tools if TOOL_SERVICE_URL is set
+    if os.path.exists(REGISTRY_PATH):
+        await agent_router.start()
+
+    # Try to auto-discover tools if TOOL_SERVICE_URL is set; runs in the background
+    # so the gateway serves immediately while tool services are still starting
+    discovery = None
     if TOOL_SERVICE_URL and TOOL_SERVICE_URL != "http://0.0.0.0:8000":
-        try:
-            await asyncio.sleep(2)  # Give tool service time to start
-            result = await discover_and_register_tools()
-            print(f"Startup discovery: {result['summary']}")
-        except Exception as e:
-            print(f"Startup discovery failed: {e}")
+        discovery = asyncio.create_task(startup_discovery())
 
     yield  # ← the point where the app runs
 
+    if discovery is not None:
+        discovery.cancel()
+
+    await close_service_clients()
+    if tool_channels is not None:
+        await tool_channels.close()
+    await agent_router.close()
+
 mcp = FastMCP("agent-server")
 app = FastAPI(title="MCP Server",lifespan=lifespan)
 
 TOOL_SERVICE_URL = os.getenv("TOOL_SERVICE_URL","http://0.0.0.0:8000")
+# Several tool services may be listed comma-separated; they are discovered concurrently
+TOOL_SERVICE_URLS = [url.strip() for url in TOOL_SERVICE_URL.split(",") if url.strip()]
+# How long startup discovery keeps polling a tool service that isn't up yet
+DISCOVERY_TIMEOUT = float(os.getenv("DISCOVERY_TIMEOUT", 30.0))
 
 registered_tools: Dict[str, Dict[str, Any]] = {}
 
+# Load-balanced gRPC pools for the agents in config/agent_registry.yaml
+agent_router = AgentRouter(REGISTRY_PATH, drain_timeout=float(os.getenv("AGENT_DRAIN_TIMEOUT", 30)))
+
 # def create_proxy_tool(tool_name: str, service_url: str, description: str):
 #     """Dynamically created proxy tool"""
 
@@ -63,40 +87,129 @@ registered_tools: Dict[str, Dict[str, Any]] = {}
     
 #     return proxy_tool
 
-import textwrap
-
-def create_proxy_tool(tool_name: str, service_url: str, description: str, parameters: Dict[str, str]):
+PARAMETER_TYPES = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "list": list,
+    "dict": dict,
+}
+
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", 10.0))
+TOOL_MAX_CONNECTIONS = int(os.getenv("TOOL_MAX_CONNECTIONS", 100))
+TOOL_MAX_KEEPALIVE = int(os.getenv("TOOL_MAX_KEEPALIVE", 20))
+
+# Per-tool circuit breaker and concurrency bulkhead, so one slow service can't starve the rest
+RESILIENCE_CONFIG = ResilienceConfig.from_env()
+tool_guards: Dict[str, ToolGuard] = {}
+
+# One pooled client per tool service, shared by every tool it serves
+service_clients: Dict[str, httpx.AsyncClient] = {}
+
+def get_service_client(service_url: str) -> httpx.AsyncClient:
+    """Return the pooled client for a tool service, creating it on first use"""
+    client = service_clients.get(service_url)
+    if client is None:
+        client = httpx.AsyncClient(
+            base_url=service_url,
+            timeout=TOOL_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=TOOL_MAX_CONNECTIONS,
+                max_keepalive_connections=TOOL_MAX_KEEPALIVE
+            )
+        )
+        service_clients[service_url] = client
+    return client
+
+async def release_service_client(service_url: str):
+    """Close a tool service's client once no registered tool uses it"""
+    if any(info["service_url"] == service_url for info in registered_tools.values()):
+        return
+    client = service_clients.pop(service_url, None)
+    if client is not None:
+        await client.aclose()
+
+# gRPC channels for tools registered with a grpc_target, created on first use
+tool_channels = None
+
+def get_tool_channels():
+    global tool_channels
+    if tool_channels is None:
+        from tool_channels import ToolChannels
+        tool_channels = ToolChannels()
+    return tool_channels
+
+async def release_tool_channel(grpc_target: str):
+    """Close a gRPC channel once no registered tool uses it"""
+    if tool_channels is None:
+        return
+    if any(info.get("grpc_target") == grpc_target for info in registered_tools.values()):
+        return
+    await tool_channels.release(grpc_target)
+
+async def close_service_clients():
+    clients = list(service_clients.values())
+    service_clients.clear()
+    await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+
+def create_proxy_tool(
+    tool_name: str,
+    service_url: str,
+    description: str,
+    parameters: Dict[str, str],
+    grpc_target: str = ""
+):
     """Dynamically created proxy tool with explicit parameters"""
-    params_signature = ", ".join(parameters.keys())
-    params_dict = ", ".join(f"'{k}': {k}" for k in parameters.keys())
-
-    fn_code = f"""
-    async def proxy_tool({params_signature}):
+    signature = inspect.Signature([
+        inspect.Parameter(
+            name,
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            annotation=PARAMETER_TYPES.get(type_name, Any)
+        )
+        for name, type_name in parameters.items()
+    ])
+
+    async def proxy_tool(*args, **kwargs) -> Any:
+        arguments = signature.bind(*args, **kwargs).arguments
+        # FastMCP keeps unregistered tools callable; don't recreate their guard or client
+        guard = tool_guards.get(tool_name)
+        if tool_name not in registered_tools or guard is None:
+            raise Exception(f"Tool '{tool_name}' is not registered")
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with guard.protect():
+                if grpc_target:
+                    return await get_tool_channels().execute(
+                        grpc_target, tool_name, dict(arguments), TOOL_TIMEOUT
+                    )
+
+                client = get_service_client(service_url)
                 response = await client.post(
-                    "{service_url}/tools/{tool_name}",
-                    json={{"parameters": {{{params_dict}}}}}
+                    f"/tools/{tool_name}",
+                    json={"parameters": dict(arguments)}
                 )
                 response.raise_for_status()
                 result = response.json()
 
                 if result.get("error"):
-                    raise Exception(f"Tool execution error: {{result['error']}}")
+                    raise ToolError(f"Tool execution error: {result['error']}")
 
                 return result["result"]
 
+        except (CircuitOpenError, BulkheadFullError) as e:
+            raise Exception(f"Tool '{tool_name}' unavailable: {str(e)}")
+
         except httpx.HTTPError as e:
-            raise Exception(f"HTTP error calling tool service: {{str(e)}}")
+            raise Exception(f"HTTP error calling tool service: {str(e)}")
 
         except Exception as e:
-            raise Exception(f"Error executing tool '{tool_name}': {{str(e)}}")
-    """
-
-    local_vars = {}
-    exec(textwrap.dedent(fn_code), globals(), local_vars)
-    proxy_tool = local_vars['proxy_tool']
+            raise Exception(f"Error executing tool '{tool_name}': {str(e)}")
 
+    # FastMCP builds the tool schema from the signature, so expose the real parameters
+    proxy_tool.__signature__ = signature
+    proxy_tool.__annotations__ = {
+        name: param.annotation for name, param in signature.parameters.items()
+    }
     proxy_tool.__name__ = tool_name
     proxy_tool.__doc__ = description or f"Proxy tool for {tool_name}"
 
@@ -121,17 +234,25 @@ async def register_tool(request: ToolRegistrationRequest):
             tool_name,
             request.tool_service_url,
             request.description,        
-            request.parameters
+            request.parameters,
+            request.grpc_target
         )
 
         decorated_tool = mcp.tool(tool_name)(proxy_function)
+        # Warm the pool (or channel) at registration
+        if request.grpc_target:
+            get_tool_channels().stub(request.grpc_target)
+        else:
+            get_service_client(request.tool_service_url)
 
         registered_tools[tool_name] ={
             "service_url" : request.tool_service_url,
             "description": request.description,
             "parameters": request.parameters,
+            "grpc_target": request.grpc_target,
             "function": decorated_tool
         }
+        tool_guards[tool_name] = ToolGuard(RESILIENCE_CONFIG)
 
         return {
             "status": "success",
@@ -146,6 +267,34 @@ async def register_tool(request: ToolRegistrationRequest):
 
     
 
+@app.post("/admin/register-tools")
+async def register_tools(request: BulkToolRegistrationRequest):
+    """Register many tools in one call"""
+    return await register_many(request.tools)
+
+async def register_many(requests: List[ToolRegistrationRequest]) -> Dict[str, Any]:
+    registered = []
+    skipped = []
+    failed = []
+    for reg_request in requests:
+        try:
+            result = await register_tool(reg_request)
+            if result["status"] == "success":
+                registered.append(reg_request.tool_name)
+            else:
+                skipped.append(reg_request.tool_name)
+        except HTTPException as e:
+            failed.append(f"{reg_request.tool_name}: {e.detail}")
+
+    return {
+        "status": "completed",
+        "registered": registered,
+        "skipped": skipped,
+        "failed": failed,
+        "total_tools": len(registered_tools),
+        "summary": f"Registered {len(registered)}, Skipped {len(skipped)}, Failed {len(failed)}"
+    }
+
 @app.get("/admin/tools")
 async def list_registered_tools():
     """List all currently registered tools"""
@@ -154,7 +303,9 @@ async def list_registered_tools():
             name: {
                 "service_url": info["service_url"],
                 "description": info["description"],
-                "parameters": info["parameters"]
+                "parameters": info["parameters"],
+                "grpc_target": info["grpc_target"],
+                **tool_guards[name].stats()
             }
             for name, info in registered_tools.items()
         },
@@ -168,7 +319,11 @@ async def unregister_tool(tool_name:str):
     if tool_name not in registered_tools:
         raise HTTPException(status_code=404, detail=f"Tool '{tool_name} not found'")
 
-    del registered_tools[tool_name]
+    info = registered_tools.pop(tool_name)
+    tool_guards.pop(tool_name, None)
+    await release_service_client(info["service_url"])
+    if info["grpc_target"]:
+        await release_tool_channel(info["grpc_target"])
 
     return {
         "status": "success",
@@ -177,54 +332,106 @@ async def unregister_tool(tool_name:str):
     }
 
 
+async def wait_until_ready(client: httpx.AsyncClient, service_url: str, timeout: float) -> bool:
+    """Poll a tool service's /health with jittered exponential backoff until it answers"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = 0.05
+    while True:
+        try:
+            response = await client.get(f"{service_url}/health", timeout=2.0)
+            if response.status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(delay * random.uniform(0.5, 1.5), remaining))
+        delay = min(delay * 2, 2.0)
+
+async def discover_service(client: httpx.AsyncClient, service_url: str, wait: bool = False) -> List[ToolRegistrationRequest]:
+    """Registration requests for every tool a service lists at GET /tools"""
+    if wait and not await wait_until_ready(client, service_url, DISCOVERY_TIMEOUT):
+        raise Exception(f"not ready after {DISCOVERY_TIMEOUT}s")
+
+    response = await client.get(f"{service_url}/tools")
+    response.raise_for_status()
+    return [
+        ToolRegistrationRequest(
+            tool_name=tool_name,
+            tool_service_url=service_url,
+            description=tool_info.get("description", ""),
+            parameters=tool_info.get("parameters", {}),
+            grpc_target=tool_info.get("grpc_target", "")
+        )
+        for tool_name, tool_info in response.json().items()
+    ]
+
 @app.post("/admin/discover-tools")
-async def discover_and_register_tools():
-    """Discover tools from the tool service and register them"""
-    
+async def discover_and_register_tools(wait: bool = False):
+    """Discover tools from every tool service concurrently and register them in bulk"""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        discovered = await asyncio.gather(
+            *(discover_service(client, url, wait) for url in TOOL_SERVICE_URLS),
+            return_exceptions=True
+        )
+
+    requests = []
+    unreachable = []
+    for service_url, result in zip(TOOL_SERVICE_URLS, discovered):
+        if isinstance(result, BaseException):
+            unreachable.append(f"{service_url}: {str(result)}")
+        else:
+            requests.extend(result)
+
+    if unreachable and not requests:
+        raise HTTPException(status_code=500, detail=f"Discovery failed: {'; '.join(unreachable)}")
+
+    result = await register_many(requests)
+    result["failed"].extend(unreachable)
+    result["summary"] = (
+        f"Registered {len(result['registered'])}, Skipped {len(result['skipped'])}, "
+        f"Failed {len(result['failed'])}"
+    )
+    return result
+
+async def startup_discovery():
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{TOOL_SERVICE_URL}/tools")
-            response.raise_for_status()
-            available_tools = response.json()
-        
-        registered = []
-        skipped = []
-        failed = []
-        
-        for tool_name, tool_info in available_tools.items():
-            if tool_name in registered_tools:
-                skipped.append(tool_name)
-                continue
-            
-            try:
-                # Create registration request
-                reg_request = ToolRegistrationRequest(
-                    tool_name=tool_name,
-                    tool_service_url=TOOL_SERVICE_URL,
-                    description=tool_info.get("description", ""),
-                    parameters=tool_info.get("parameters", {})
-                )
-                
-                # Register the tool
-                result = await register_tool(reg_request)
-                if result["status"] == "success":
-                    registered.append(tool_name)
-                else:
-                    failed.append(f"{tool_name}: {result['message']}")
-                    
-            except Exception as e:
-                failed.append(f"{tool_name}: {str(e)}")
-        
-        return {
-            "status": "completed",
-            "registered": registered,
-            "skipped": skipped,
-            "failed": failed,
-            "summary": f"Registered {len(registered)}, Skipped {len(skipped)}, Failed {len(failed)}"
-        }
-        
+        result = await discover_and_register_tools(wait=True)
+        print(f"Startup discovery: {result['summary']}")
+    except Exception as e:
+        print(f"Startup discovery failed: {e}")
+
+# =============================================================================
+# AGENT ROUTING
+# =============================================================================
+
+@app.post("/agents/validator/validate")
+async def validate_via_agent(request: ValidationProxyRequest):
+    """Validate through the least-loaded / next healthy validator replica"""
+    from shared.protos.compiled import validator_pb2_grpc
+    from shared.utils.protobuf import validation_input, validation_result
+
+    message = validation_input(
+        request.query, request.rag_response, request.web_results, request.rag_confidence
+    )
+    try:
+        async with agent_router.endpoint("validator") as endpoint:
+            response = await endpoint.stub(validator_pb2_grpc.ValidatorAgentStub).Validate(
+                message, timeout=TOOL_TIMEOUT
+            )
+        return validation_result(response)
+    except NoAvailableEndpoint as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Discovery failed: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Validator call failed: {str(e)}")
+
+
+@app.get("/admin/agents")
+async def list_agents():
+    """Registry endpoints with their health, ejection and load state"""
+    return agent_router.stats()
 
 # =============================================================================
 # MCP TOOL FOR SELF-MANAGEMENT
@@ -281,15 +488,18 @@ async def root():
     return {
         "message": "MCP Server is running",
         "registered_tools": len(registered_tools),
-        "tool_service_url": TOOL_SERVICE_URL
+        "tool_service_urls": TOOL_SERVICE_URLS
     }
 
 @app.get("/health")
 async def health_check():
+    circuits = {name: guard.breaker.state for name, guard in tool_guards.items()}
     return {
-        "status": "healthy", 
+        # The gateway itself is up; "degraded" means some tools are failing fast
+        "status": "degraded" if any(state != "closed" for state in circuits.values()) else "healthy",
         "service": "mcp-server",
-        "registered_tools": len(registered_tools)
+        "registered_tools": len(registered_tools),
+        "circuits": circuits
     }
 
 # =============================================================================
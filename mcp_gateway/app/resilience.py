@@ -0,0 +1,231 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, List
+
+import httpx
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class BulkheadFullError(Exception):
+    pass
+
+
+class ToolError(Exception):
+    """The tool service answered, but with an error: not a sign the service is unhealthy"""
+
+
+@dataclass
+class ResilienceConfig:
+    """Breaker and bulkhead settings applied to every proxied tool"""
+    error_threshold: float = 0.5    # error rate over the window that opens the breaker
+    min_requests: int = 10          # don't judge the error rate on fewer calls than this
+    window_seconds: float = 30.0
+    open_seconds: float = 15.0      # how long an open breaker rejects before probing
+    half_open_calls: int = 1        # concurrent probes allowed while half-open
+    max_concurrency: int = 20
+    max_queue: int = 50
+    queue_timeout: float = 2.0
+
+    @classmethod
+    def from_env(cls) -> "ResilienceConfig":
+        return cls(
+            error_threshold=float(os.getenv("BREAKER_ERROR_THRESHOLD", 0.5)),
+            min_requests=int(os.getenv("BREAKER_MIN_REQUESTS", 10)),
+            window_seconds=float(os.getenv("BREAKER_WINDOW", 30.0)),
+            open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", 15.0)),
+            half_open_calls=int(os.getenv("BREAKER_HALF_OPEN_CALLS", 1)),
+            max_concurrency=int(os.getenv("TOOL_MAX_CONCURRENCY", 20)),
+            max_queue=int(os.getenv("TOOL_MAX_QUEUE", 50)),
+            queue_timeout=float(os.getenv("TOOL_QUEUE_TIMEOUT", 2.0)),
+        )
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker over a rolling window of call outcomes.
+
+    Outcomes are counted in one-second buckets so the error rate always covers
+    the last window_seconds. Once open, calls are rejected until open_seconds
+    have passed; then up to half_open_calls probes go through, and the first
+    probe result closes or re-opens the breaker.
+    """
+
+    def __init__(self, config: ResilienceConfig):
+        self.config = config
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._buckets: Deque[List[float]] = deque()  # [second, successes, failures]
+        self._probes = 0
+
+    def _bucket(self) -> List[float]:
+        now = int(time.monotonic())
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+        while self._buckets and self._buckets[0][0] <= now - self.config.window_seconds:
+            self._buckets.popleft()
+        return self._buckets[-1]
+
+    def _counts(self):
+        self._bucket()
+        successes = sum(bucket[1] for bucket in self._buckets)
+        failures = sum(bucket[2] for bucket in self._buckets)
+        return successes, failures
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError if the call must not go out; returns True for a half-open probe"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.config.open_seconds:
+                self.rejected += 1
+                raise CircuitOpenError("circuit open")
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._probes >= self.config.half_open_calls:
+                self.rejected += 1
+                raise CircuitOpenError("circuit half-open, probe in flight")
+            self._probes += 1
+            return True
+        return False
+
+    def record_success(self, probe: bool = False):
+        self._bucket()[1] += 1
+        if probe:
+            self._probes -= 1
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._buckets.clear()
+
+    def record_failure(self, probe: bool = False):
+        self._bucket()[2] += 1
+        if probe:
+            self._probes -= 1
+            if self.state == HALF_OPEN:
+                self._open()
+            return
+        if self.state == CLOSED:
+            successes, failures = self._counts()
+            total = successes + failures
+            if total >= self.config.min_requests and failures / total >= self.config.error_threshold:
+                self._open()
+
+    def release_probe(self):
+        """A probe was cancelled before it produced an outcome"""
+        self._probes -= 1
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def stats(self) -> Dict:
+        successes, failures = self._counts()
+        total = successes + failures
+        stats = {
+            "state": self.state,
+            "window_requests": total,
+            "window_error_rate": failures / total if total else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+        if self.state == OPEN:
+            stats["retry_in_seconds"] = max(
+                self.config.open_seconds - (time.monotonic() - self.opened_at), 0.0
+            )
+        return stats
+
+
+class Bulkhead:
+    """Bounded concurrency with a bounded wait queue; overflow is rejected immediately"""
+
+    def __init__(self, config: ResilienceConfig):
+        self.config = config
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        # Count callers still acquiring as queued, or a burst could all pass this check at once
+        if self.in_flight + self.queued >= self.config.max_concurrency + self.config.max_queue:
+            self.rejected += 1
+            raise BulkheadFullError("too many concurrent calls")
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.config.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise BulkheadFullError(f"no free slot within {self.config.queue_timeout}s")
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.config.max_concurrency,
+            "max_queue": self.config.max_queue,
+            "rejected": self.rejected,
+        }
+
+
+class ToolGuard:
+    """Circuit breaker plus bulkhead for one proxied tool"""
+
+    def __init__(self, config: ResilienceConfig):
+        self.breaker = CircuitBreaker(config)
+        self.bulkhead = Bulkhead(config)
+
+    @asynccontextmanager
+    async def protect(self) -> AsyncIterator[None]:
+        """Fail fast when the breaker is open or the queue is full, and record the outcome"""
+        probe = self.breaker.before_call()
+        outcome_recorded = False
+        try:
+            async with self.bulkhead.slot():
+                try:
+                    yield
+                except ToolError:
+                    self.breaker.record_success(probe)
+                    outcome_recorded = True
+                    raise
+                except httpx.HTTPStatusError as e:
+                    # 4xx means our request was wrong, not that the service is down
+                    if e.response.status_code < 500:
+                        self.breaker.record_success(probe)
+                    else:
+                        self.breaker.record_failure(probe)
+                    outcome_recorded = True
+                    raise
+                except Exception:
+                    self.breaker.record_failure(probe)
+                    outcome_recorded = True
+                    raise
+                else:
+                    self.breaker.record_success(probe)
+                    outcome_recorded = True
+        finally:
+            # Rejected by the bulkhead or cancelled: the probe never reported back
+            if probe and not outcome_recorded:
+                self.breaker.release_probe()
+
+    def stats(self) -> Dict:
+        return {"circuit": self.breaker.stats(), "bulkhead": self.bulkhead.stats()}
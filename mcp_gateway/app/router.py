@@ -0,0 +1,373 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import grpc
+import yaml
+
+try:
+    from grpc_health.v1 import health_pb2, health_pb2_grpc
+    HEALTH_PROTOCOL_AVAILABLE = True
+except ImportError:
+    HEALTH_PROTOCOL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_PATH = os.getenv(
+    "AGENT_REGISTRY_PATH",
+    os.path.join(os.path.dirname(__file__), "config", "agent_registry.yaml")
+)
+
+ROUND_ROBIN = "round_robin"
+LEAST_OUTSTANDING = "least_outstanding"
+POWER_OF_TWO = "power_of_two"
+POLICIES = (ROUND_ROBIN, LEAST_OUTSTANDING, POWER_OF_TWO)
+
+# Failures that say something about the endpoint rather than the request
+OUTLIER_CODES = frozenset({
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.UNKNOWN,
+})
+
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+]
+
+# Per-agent settings and their defaults; any of them may be set in the registry
+DEFAULT_SETTINGS = {
+    "load_balancing": ROUND_ROBIN,
+    "health_check_interval": 10.0,   # seconds between active checks
+    "health_check_timeout": 2.0,
+    "consecutive_failures": 5,       # failures in a row before an endpoint is ejected
+    "base_ejection_time": 30.0,      # doubled each time the same endpoint is ejected again
+    "max_ejection_time": 300.0,
+    "max_ejection_percent": 50,      # never eject more than this share of a pool
+}
+
+
+class NoAvailableEndpoint(Exception):
+    pass
+
+
+def agent_settings(name: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Registry settings merged over the defaults; raises ValueError if they are invalid"""
+    merged = {**DEFAULT_SETTINGS, **settings}
+    if merged["load_balancing"] not in POLICIES:
+        raise ValueError(
+            f"Unknown load_balancing '{merged['load_balancing']}' for '{name}', "
+            f"expected one of {', '.join(POLICIES)}"
+        )
+    return merged
+
+
+class Endpoint:
+    """One backend address with its pooled channel and health/outlier state"""
+
+    def __init__(self, address: str):
+        self.address = address
+        self.channel: Optional[grpc.aio.Channel] = None
+        self._stubs: Dict[type, Any] = {}
+        self.outstanding = 0
+        self.requests_total = 0
+        self.failures_total = 0
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    def open(self) -> grpc.aio.Channel:
+        if self.channel is None:
+            self.channel = grpc.aio.insecure_channel(self.address, options=CHANNEL_OPTIONS)
+        return self.channel
+
+    def stub(self, stub_cls):
+        """Stub of the given type bound to this endpoint's persistent channel"""
+        stub = self._stubs.get(stub_cls)
+        if stub is None:
+            stub = self._stubs[stub_cls] = stub_cls(self.open())
+        return stub
+
+    @property
+    def ejected(self) -> bool:
+        return time.monotonic() < self.ejected_until
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and not self.ejected
+
+    async def close(self):
+        self._stubs.clear()
+        if self.channel is not None:
+            await self.channel.close()
+            self.channel = None
+
+    def stats(self) -> Dict:
+        return {
+            "healthy": self.healthy,
+            "ejected": self.ejected,
+            "ejections": self.ejections,
+            "outstanding": self.outstanding,
+            "requests_total": self.requests_total,
+            "failures_total": self.failures_total,
+            "consecutive_failures": self.consecutive_failures,
+            "channel": str(self.channel.get_state()) if self.channel is not None else "idle",
+        }
+
+
+class AgentPool:
+    """The endpoints of one agent type and the policy used to pick between them"""
+
+    def __init__(self, name: str, addresses: List[str], settings: Dict[str, Any]):
+        self.name = name
+        self.endpoints: Dict[str, Endpoint] = {}
+        self._next = 0
+        self.configure(addresses, settings)
+
+    def configure(self, addresses: List[str], settings: Dict[str, Any]) -> List[Endpoint]:
+        """Apply (new) registry settings; returns endpoints that were removed so the caller can close them"""
+        self.settings = agent_settings(self.name, settings)
+
+        # Endpoints that stay keep their channel and statistics
+        removed = [endpoint for address, endpoint in self.endpoints.items() if address not in addresses]
+        self.endpoints = {
+            address: self.endpoints.get(address) or Endpoint(address)
+            for address in dict.fromkeys(addresses)
+        }
+        return removed
+
+    @property
+    def policy(self) -> str:
+        return self.settings["load_balancing"]
+
+    def pick(self) -> Endpoint:
+        endpoints = list(self.endpoints.values())
+        candidates = [endpoint for endpoint in endpoints if endpoint.available]
+        if not candidates:
+            # Panic mode: a possibly-bad endpoint beats failing every request
+            candidates = [endpoint for endpoint in endpoints if not endpoint.ejected] or endpoints
+        if not candidates:
+            raise NoAvailableEndpoint(f"No endpoints registered for '{self.name}'")
+
+        if self.policy == LEAST_OUTSTANDING:
+            fewest = min(endpoint.outstanding for endpoint in candidates)
+            return random.choice([endpoint for endpoint in candidates if endpoint.outstanding == fewest])
+        if self.policy == POWER_OF_TWO and len(candidates) > 1:
+            first, second = random.sample(candidates, 2)
+            return first if first.outstanding <= second.outstanding else second
+
+        self._next = (self._next + 1) % len(candidates)
+        return candidates[self._next]
+
+    def record_success(self, endpoint: Endpoint):
+        endpoint.consecutive_failures = 0
+
+    def record_failure(self, endpoint: Endpoint):
+        endpoint.failures_total += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.settings["consecutive_failures"] and not endpoint.ejected:
+            self._eject(endpoint)
+
+    def _eject(self, endpoint: Endpoint):
+        ejected = sum(1 for other in self.endpoints.values() if other.ejected)
+        if (ejected + 1) * 100 > self.settings["max_ejection_percent"] * len(self.endpoints):
+            logger.warning(f"Not ejecting {endpoint.address}: '{self.name}' is at its ejection limit")
+            return
+        duration = min(
+            self.settings["base_ejection_time"] * 2 ** endpoint.ejections,
+            self.settings["max_ejection_time"]
+        )
+        endpoint.ejections += 1
+        endpoint.ejected_until = time.monotonic() + duration
+        endpoint.consecutive_failures = 0
+        logger.warning(f"Ejected {endpoint.address} from '{self.name}' for {duration:.0f}s")
+
+    def stats(self) -> Dict:
+        return {
+            "load_balancing": self.policy,
+            "endpoints": {address: endpoint.stats() for address, endpoint in self.endpoints.items()},
+        }
+
+
+class AgentRouter:
+    """
+    Client-side load balancer for agent gRPC services listed in agent_registry.yaml.
+
+    Each endpoint keeps one persistent channel. Requests go to an endpoint
+    picked by the agent's policy (round_robin, least_outstanding or
+    power_of_two). Endpoints that fail health checks are skipped, endpoints
+    with consecutive call failures are ejected for a growing period, and the
+    registry file is re-read when it changes. Endpoints dropped from the
+    registry stop receiving new calls at once but keep their channel until
+    in-flight calls finish (or drain_timeout passes).
+    """
+
+    def __init__(self, path: str = REGISTRY_PATH, reload_interval: float = 5.0, drain_timeout: float = 30.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.drain_timeout = drain_timeout
+        self.pools: Dict[str, AgentPool] = {}
+        self._mtime: Optional[float] = None
+        self._tasks: List[asyncio.Task] = []
+        self._draining: Dict[Endpoint, asyncio.Task] = {}
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        with open(self.path) as f:
+            return yaml.safe_load(f) or {}
+
+    async def load(self):
+        """
+        (Re)load the registry, keeping channels of endpoints that are still listed.
+        The whole file is validated first, so an invalid one leaves every pool untouched.
+        """
+        mtime = os.path.getmtime(self.path)
+        registry = self._read()
+        if not isinstance(registry, dict):
+            raise ValueError(f"Agent registry {self.path} must map agent names to settings")
+
+        parsed = {}
+        for name, config in registry.items():
+            config = dict(config or {})
+            addresses = config.pop("endpoints", []) or []
+            if not isinstance(addresses, list):
+                raise ValueError(f"endpoints for '{name}' must be a list")
+            parsed[name] = ([str(address) for address in addresses], agent_settings(name, config))
+
+        removed: List[Endpoint] = []
+        pools = {}
+        for name, (addresses, config) in parsed.items():
+            pool = self.pools.get(name)
+            if pool is None:
+                pool = AgentPool(name, addresses, config)
+            else:
+                removed.extend(pool.configure(addresses, config))
+            pools[name] = pool
+        for name, pool in self.pools.items():
+            if name not in pools:
+                removed.extend(pool.endpoints.values())
+
+        self.pools = pools
+        self._mtime = mtime
+        for endpoint in removed:
+            task = self._draining[endpoint] = asyncio.create_task(self._drain(endpoint))
+            task.add_done_callback(lambda _, endpoint=endpoint: self._draining.pop(endpoint, None))
+        logger.info(f"Loaded agent registry: { {name: len(pool.endpoints) for name, pool in pools.items()} }")
+
+    async def start(self):
+        await self.load()
+        self._tasks = [
+            asyncio.create_task(self._watch_registry()),
+            asyncio.create_task(self._health_checks()),
+        ]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        draining = list(self._draining)
+        for task in list(self._draining.values()):
+            task.cancel()
+        for endpoint in draining:
+            await endpoint.close()
+        for pool in self.pools.values():
+            for endpoint in pool.endpoints.values():
+                await endpoint.close()
+
+    async def _drain(self, endpoint: Endpoint):
+        """Close a removed endpoint once its in-flight calls are done"""
+        deadline = time.monotonic() + self.drain_timeout
+        while endpoint.outstanding and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if endpoint.outstanding:
+            logger.warning(
+                f"Closing {endpoint.address} with {endpoint.outstanding} calls still in flight "
+                f"after {self.drain_timeout}s"
+            )
+        await endpoint.close()
+
+    async def _watch_registry(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if os.path.getmtime(self.path) != self._mtime:
+                    await self.load()
+            except Exception as e:
+                # A half-written or invalid file keeps the previous configuration
+                logger.error(f"Agent registry reload failed: {e}")
+
+    async def _health_checks(self):
+        while True:
+            checks = [
+                self._check(pool, endpoint)
+                for pool in list(self.pools.values())
+                for endpoint in list(pool.endpoints.values())
+            ]
+            await asyncio.gather(*checks, return_exceptions=True)
+            intervals = [pool.settings["health_check_interval"] for pool in self.pools.values()]
+            await asyncio.sleep(min(intervals, default=DEFAULT_SETTINGS["health_check_interval"]))
+
+    async def _check(self, pool: AgentPool, endpoint: Endpoint):
+        timeout = pool.settings["health_check_timeout"]
+        try:
+            if HEALTH_PROTOCOL_AVAILABLE:
+                response = await endpoint.stub(health_pb2_grpc.HealthStub).Check(
+                    health_pb2.HealthCheckRequest(), timeout=timeout
+                )
+                healthy = response.status == health_pb2.HealthCheckResponse.SERVING
+            else:
+                await asyncio.wait_for(endpoint.open().channel_ready(), timeout=timeout)
+                healthy = True
+        except grpc.aio.AioRpcError as e:
+            # A server without the health service is still up
+            healthy = e.code() == grpc.StatusCode.UNIMPLEMENTED
+        except Exception:
+            healthy = False
+
+        if healthy != endpoint.healthy:
+            logger.warning(f"{pool.name} endpoint {endpoint.address} is now {'healthy' if healthy else 'unhealthy'}")
+        endpoint.healthy = healthy
+
+    @asynccontextmanager
+    async def endpoint(self, agent: str) -> AsyncIterator[Endpoint]:
+        """
+        Pick an endpoint for one call and track it:
+
+            async with router.endpoint("validator") as endpoint:
+                await endpoint.stub(ValidatorAgentStub).Validate(request)
+        """
+        pool = self.pools.get(agent)
+        if pool is None:
+            raise NoAvailableEndpoint(f"Agent '{agent}' is not in the registry")
+        endpoint = pool.pick()
+        endpoint.outstanding += 1
+        endpoint.requests_total += 1
+        try:
+            yield endpoint
+        except grpc.aio.AioRpcError as e:
+            if e.code() in OUTLIER_CODES:
+                pool.record_failure(endpoint)
+            raise
+        except (asyncio.TimeoutError, ConnectionError):
+            pool.record_failure(endpoint)
+            raise
+        else:
+            pool.record_success(endpoint)
+        finally:
+            endpoint.outstanding -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "registry": self.path,
+            "health_protocol": HEALTH_PROTOCOL_AVAILABLE,
+            "agents": {name: pool.stats() for name, pool in self.pools.items()},
+            "draining": {endpoint.address: endpoint.outstanding for endpoint in self._draining},
+        }
@@ -1,8 +1,18 @@
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 class ToolRegistrationRequest(BaseModel):
     tool_name: str
     tool_service_url: str
     description: str = ""
     parameters: Dict[str,str] = {}
+    grpc_target: str = ""  # host:port of the service's gRPC ToolService; HTTP when empty
+
+class BulkToolRegistrationRequest(BaseModel):
+    tools: List[ToolRegistrationRequest]
+
+class ValidationProxyRequest(BaseModel):
+    query: str
+    rag_response: str
+    web_results: List[Dict[str, Any]] = []
+    rag_confidence: Optional[float] = None
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Dict
+
+import grpc
+
+from shared.protos.compiled import mcp_core_pb2, mcp_core_pb2_grpc
+from shared.utils.protobuf import message_to_dict, to_message
+
+from resilience import ToolError
+
+# Errors about the call itself; anything else counts against the service's circuit breaker
+REQUEST_ERROR_CODES = frozenset({
+    grpc.StatusCode.INVALID_ARGUMENT,
+    grpc.StatusCode.NOT_FOUND,
+    grpc.StatusCode.FAILED_PRECONDITION,
+    grpc.StatusCode.OUT_OF_RANGE,
+})
+
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+]
+
+
+class ToolChannels:
+    """One persistent gRPC channel per tool service, shared by every tool it serves"""
+
+    def __init__(self):
+        self.channels: Dict[str, grpc.aio.Channel] = {}
+        self.stubs: Dict[str, mcp_core_pb2_grpc.ToolServiceStub] = {}
+
+    def stub(self, target: str) -> mcp_core_pb2_grpc.ToolServiceStub:
+        stub = self.stubs.get(target)
+        if stub is None:
+            channel = grpc.aio.insecure_channel(target, options=CHANNEL_OPTIONS)
+            self.channels[target] = channel
+            stub = self.stubs[target] = mcp_core_pb2_grpc.ToolServiceStub(channel)
+        return stub
+
+    async def execute(self, target: str, tool_name: str, arguments: Dict[str, Any], timeout: float) -> Any:
+        try:
+            response = await self.stub(target).Execute(
+                to_message({"tool_name": tool_name, "parameters": arguments}, mcp_core_pb2.ToolCall),
+                timeout=timeout
+            )
+        except grpc.aio.AioRpcError as e:
+            if e.code() in REQUEST_ERROR_CODES:
+                raise ToolError(e.details()) from e
+            raise
+        if response.error:
+            raise ToolError(f"Tool execution error: {response.error}")
+        return message_to_dict(response).get("result")
+
+    async def release(self, target: str):
+        self.stubs.pop(target, None)
+        channel = self.channels.pop(target, None)
+        if channel is not None:
+            await channel.close()
+
+    async def close(self):
+        channels = list(self.channels.values())
+        self.channels.clear()
+        self.stubs.clear()
+        await asyncio.gather(*(channel.close() for channel in channels), return_exceptions=True)
+
+    def stats(self) -> Dict[str, str]:
+        return {target: str(channel.get_state()) for target, channel in self.channels.items()}
@@ -1,14 +1,19 @@
 from fastapi import FastAPI, HTTPException
+import asyncio
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List
 import logging
+import json
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
 from chains.rag_chains import RAGChain, RAGRequest
-from retrievers.pinecone import PineconeRetriever
 from chains.context import ChainContext
+from cache.semantic import SemanticCache
+from cache.retrieval import RetrievalCache
+from retrievers.rerank import Reranker
 
 app = FastAPI()
 
@@ -18,8 +23,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-retriever = PineconeRetriever()
-rag_chain = RAGChain(retriever)
+# RETRIEVER_BACKEND=local serves from a NumPy index on disk (see retrievers/local.py)
+if os.getenv("RETRIEVER_BACKEND", "pinecone").lower() == "local":
+    from retrievers.local import LocalRetriever
+    retriever = LocalRetriever.from_env()
+else:
+    from retrievers.pinecone import PineconeRetriever
+    retriever = PineconeRetriever()
+# RETRIEVER_HYBRID=true fuses the dense results with BM25 over the same chunks
+if os.getenv("RETRIEVER_HYBRID", "false").lower() == "true":
+    from retrievers.hybrid import HybridRetriever
+    retriever = HybridRetriever.from_env(retriever)
+semantic_cache = SemanticCache.from_env() if os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true" else None
+# Retrieved documents per (search query, k), dropped when the index version changes
+index_version = os.getenv("RAG_INDEX_VERSION", getattr(retriever, "index_version", ""))
+retrieval_cache = (
+    RetrievalCache.from_env(index_version)
+    if os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true" else None
+)
+reload_lock = asyncio.Lock()
+# RERANK_METHOD=mmr|cross_encoder over-fetches RERANK_FETCH_K candidates and reranks them
+# MMR encodes candidate chunks with the raw model so they stay out of the query cache
+reranker = Reranker.from_env(getattr(retriever.embedding, "embeddings", retriever.embedding))
+if reranker is not None:
+    reranker.warm_up()
+rag_chain = RAGChain(retriever, cache=semantic_cache, retrieval_cache=retrieval_cache, reranker=reranker)
+
+class IndexVersionRequest(BaseModel):
+    version: str
 
 @app.post("/retrieve")
 async def retireve_documents(request:RAGRequest):
@@ -38,6 +69,64 @@ async def retireve_documents(request:RAGRequest):
         raise HTTPException(status_code=500,detail= str(e))
 
 
+@app.post("/retrieve/stream")
+async def stream_documents(request: RAGRequest):
+    """Server-sent events: one 'data' event per answer chunk, then an 'end' event (or an 'error' event)"""
+    async def events():
+        try:
+            async for chunk in rag_chain.stream(request):
+                yield f"data: {json.dumps({'delta': chunk})}\n\n"
+        except Exception as e:
+            logger.error(f"RAG streaming error: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+        yield f"event: end\ndata: {json.dumps({'sources': []})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/admin/index-version")
+async def set_index_version(request: IndexVersionRequest):
+    """
+    Called after re-ingesting the corpus. On a new version, indexes held in this
+    process (local vectors/IVF, BM25) are reloaded from disk before the retrieval
+    and answer caches are dropped; a hosted index (Pinecone) is already current.
+    """
+    global retriever, index_version
+    async with reload_lock:
+        if request.version == index_version:
+            return {"status": "unchanged", "index_version": index_version}
+
+        if hasattr(retriever, "reload"):
+            # Loading vectors and rebuilding BM25/IVF is blocking work
+            retriever = await asyncio.to_thread(retriever.reload)
+            rag_chain.retriever = retriever
+        index_version = request.version
+        if retrieval_cache is not None:
+            retrieval_cache.set_index_version(index_version)
+        if semantic_cache is not None:
+            semantic_cache.clear()
+    logger.info(f"Index version is now {index_version}")
+    return {"status": "success", "index_version": index_version}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Cache counters for the RAG service"""
+    return {
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        "retrieval_cache": retrieval_cache.stats() if retrieval_cache is not None else None,
+        "embedding_cache": retriever.embedding.stats(),
+        "hybrid": retriever.stats() if hasattr(retriever, "stats") else None,
+        "rerank": reranker.stats() if reranker is not None else None,
+        "context": rag_chain.packer.stats()
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
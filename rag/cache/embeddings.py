@@ -0,0 +1,263 @@
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 16
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace (all-MiniLM-L6-v2 is uncased, so this keeps vectors identical)"""
+    return " ".join(text.lower().split())
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embedding table.
+
+    Vectors live in a preallocated float32 memory-mapped file (<dir>/vectors.f32)
+    and an index file (<dir>/keys.bin) lists the text hash of each row in order.
+    Appends take an exclusive flock on the index so several processes can
+    share one store; read-only stores just pick up rows other processes add.
+    The file is sized for capacity rows up front (capacity * dim * 4 bytes,
+    ~307MB at the defaults) and never evicts: once full, new vectors are
+    only kept in memory.
+    """
+
+    def __init__(self, directory: str, dim: int, capacity: int = 200000, read_only: bool = False):
+        self.directory = directory
+        self.dim = dim
+        self.capacity = capacity
+        self.read_only = read_only
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.bin")
+
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+            size = capacity * dim * 4
+            with open(self.vectors_path, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            open(self.keys_path, "ab").close()
+
+        self._rows: Dict[bytes, int] = {}
+        self._keys_offset = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+        self.full = False
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _open(self) -> bool:
+        if self._vectors is None:
+            # A read-only store may start before the writer has created the files
+            if not (os.path.exists(self.vectors_path) and os.path.exists(self.keys_path)):
+                return False
+            rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+            self._vectors = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r" if self.read_only else "r+",
+                shape=(rows, self.dim)
+            )
+        return True
+
+    def refresh(self):
+        """Load index records appended since the last refresh (possibly by other processes)"""
+        with self._lock:
+            if not self._open():
+                return
+            with open(self.keys_path, "rb") as f:
+                f.seek(self._keys_offset)
+                data = f.read()
+            usable = len(data) - len(data) % KEY_BYTES
+            start_row = self._keys_offset // KEY_BYTES
+            for i in range(0, usable, KEY_BYTES):
+                self._rows.setdefault(data[i:i + KEY_BYTES], start_row + i // KEY_BYTES)
+            self._keys_offset += usable
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        row = self._rows.get(key)
+        if row is None:
+            self.refresh()
+            row = self._rows.get(key)
+        if row is None:
+            return None
+        return np.array(self._vectors[row])
+
+    def put(self, key: bytes, vector: np.ndarray) -> bool:
+        """Persist vector under key; returns False when read-only or full"""
+        if self.read_only or self.full or self._vectors is None or key in self._rows:
+            return False
+
+        with open(self.keys_path, "ab") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                row = os.fstat(f.fileno()).st_size // KEY_BYTES
+                if row >= self._vectors.shape[0]:
+                    self.full = True
+                    logger.warning(
+                        f"Embedding store {self.directory} is full ({row} rows); "
+                        f"new embeddings are no longer persisted"
+                    )
+                    return False
+                # Write the vector before publishing its key so readers never see an empty row
+                self._vectors[row] = vector
+                self._vectors.flush()
+                f.write(key)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+        self._rows[key] = row
+        return True
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with an in-memory LRU in front of an optional
+    memory-mapped EmbeddingStore, keyed by a hash of the normalised text.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        store: Optional[EmbeddingStore] = None,
+        max_memory_entries: int = 10000,
+        batcher=None
+    ):
+        self.embeddings = embeddings
+        self.store = store
+        # Optional EmbeddingBatcher used by aembed_query for cache misses
+        self.batcher = batcher
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        # Queries are embedded from a thread pool, so guard the LRU
+        self._memory_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, embeddings: Embeddings, dim: int, batcher=None) -> "CachedEmbeddings":
+        """
+        EMBEDDING_CACHE_DIR opts in to persistence (unset keeps the cache in memory);
+        EMBEDDING_CACHE_READONLY=true for extra workers
+        """
+        store = None
+        directory = os.getenv("EMBEDDING_CACHE_DIR", "")
+        if directory:
+            try:
+                store = EmbeddingStore(
+                    directory,
+                    dim=dim,
+                    capacity=int(os.getenv("EMBEDDING_CACHE_CAPACITY", 200000)),
+                    read_only=os.getenv("EMBEDDING_CACHE_READONLY", "false").lower() == "true"
+                )
+            except OSError as e:
+                logger.warning(f"Embedding cache disabled on disk: {e}")
+        return cls(
+            embeddings,
+            store=store,
+            max_memory_entries=int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", 10000)),
+            batcher=batcher
+        )
+
+    def _lookup(self, key: bytes) -> Optional[np.ndarray]:
+        with self._memory_lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector
+
+        if self.store is not None:
+            vector = self.store.get(key)
+            if vector is not None:
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector
+        return None
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        with self._memory_lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _save(self, key: bytes, vector: np.ndarray):
+        self._remember(key, vector)
+        if self.store is not None:
+            self.store.put(key, vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = text_key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            self.misses += 1
+            vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+            self._save(key, vector)
+        return vector.tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Like embed_query, but misses go through the micro-batcher when one is set"""
+        if self.batcher is None:
+            return await super().aembed_query(text)
+
+        # The store lookup and save do file I/O under locks the pool threads also take,
+        # so they run on the batcher's executor; only the batch wait stays on the loop
+        loop = asyncio.get_running_loop()
+        key = text_key(text)
+        vector = await loop.run_in_executor(self.batcher.executor, self._lookup, key)
+        if vector is None:
+            self.misses += 1
+            vector = np.asarray(await self.batcher.embed(text), dtype=np.float32)
+            await loop.run_in_executor(self.batcher.executor, self._save, key, vector)
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_key(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [self._lookup(key) for key in keys]
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            self.misses += len(missing)
+            # Encode all misses in one batch
+            encoded = self.embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                vectors[i] = np.asarray(vector, dtype=np.float32)
+                self._save(keys[i], vectors[i])
+
+        return [vector.tolist() for vector in vectors]
+
+    def stats(self) -> Dict:
+        stats = {
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self.store) if self.store is not None else 0,
+            "disk_capacity": self.store.capacity if self.store is not None else 0,
+            # A full store stops persisting, so disk hits plateau from here on
+            "disk_full": self.store.full if self.store is not None else False,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+        if self.batcher is not None:
+            stats["batcher"] = self.batcher.stats()
+        return stats
@@ -0,0 +1,131 @@
+import json
+import os
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+# Payloads at least this large are zlib-compressed (level 1: cheap, still ~3x on prose)
+COMPRESS_MIN_BYTES = 1024
+ENTRY_OVERHEAD_BYTES = 128
+
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def encode_documents(docs: List[Document]) -> bytes:
+    """Documents as compact JSON pairs [page_content, metadata], compressed when large"""
+    payload = json.dumps(
+        [[doc.page_content, doc.metadata] for doc in docs],
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    ).encode("utf-8")
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        return _ZLIB + zlib.compress(payload, 1)
+    return _RAW + payload
+
+
+def decode_documents(data: bytes) -> List[Document]:
+    payload = zlib.decompress(data[1:]) if data[:1] == _ZLIB else data[1:]
+    return [
+        Document(page_content=page_content, metadata=metadata)
+        for page_content, metadata in json.loads(payload)
+    ]
+
+
+class RetrievalCache:
+    """
+    LRU cache of retrieved Document lists keyed by (normalised search query, k).
+
+    Every entry is tagged with the index version it was retrieved from;
+    changing the version (after re-ingesting the corpus) drops all entries
+    at once. Documents are stored serialised, so hits return fresh objects
+    and the byte budget reflects what is actually held.
+    """
+
+    def __init__(
+        self,
+        index_version: str = "",
+        max_bytes: int = 32 * 1024 * 1024,
+        max_entries: int = 10000
+    ):
+        self.index_version = index_version
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[str, bytes]]" = OrderedDict()
+        self.size_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls, index_version: str = "") -> "RetrievalCache":
+        return cls(
+            index_version=os.getenv("RAG_INDEX_VERSION", index_version),
+            max_bytes=int(os.getenv("RETRIEVAL_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+            max_entries=int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", 10000)),
+        )
+
+    def set_index_version(self, index_version: str):
+        """Invalidate everything retrieved from an older version of the index"""
+        if index_version != self.index_version:
+            self.index_version = index_version
+            self.clear()
+            self.invalidations += 1
+
+    def get(self, query: str, k: int) -> Optional[List[Document]]:
+        key = (normalize_query(query), k)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self.index_version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return decode_documents(entry[1])
+
+    def put(self, query: str, k: int, docs: List[Document]):
+        key = (normalize_query(query), k)
+        data = encode_documents(docs)
+        size = len(data) + len(key[0]) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= len(previous[1]) + len(key[0]) + ENTRY_OVERHEAD_BYTES
+        self._entries[key] = (self.index_version, data)
+        self.size_bytes += size
+
+        while self._entries and (
+            self.size_bytes > self.max_bytes or len(self._entries) > self.max_entries
+        ):
+            (oldest_query, _), (_, oldest_data) = self._entries.popitem(last=False)
+            self.size_bytes -= len(oldest_data) + len(oldest_query) + ENTRY_OVERHEAD_BYTES
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "index_version": self.index_version,
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,205 @@
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Rough per-entry bookkeeping overhead (dict slots, dataclass, floats)
+ENTRY_OVERHEAD_BYTES = 256
+
+
+@dataclass
+class _Entry:
+    partition: Tuple[Optional[str], Optional[str]]
+    embedding: np.ndarray
+    answer: str
+    created: float
+    size: int
+
+
+class _PartitionMatrix:
+    """
+    Stacked embeddings of one entity/intent partition, grown in place.
+    Removed rows are only masked out; the matrix is compacted once more
+    than half of its rows are dead.
+    """
+
+    def __init__(self, dim: int, capacity: int = 16):
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.created = np.empty(capacity, dtype=np.float64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids: List[int] = []
+        self.rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def append(self, entry_id: int, vector: np.ndarray, created: float):
+        if len(self.ids) - len(self.rows) > len(self.rows):
+            self._compact()
+        row = len(self.ids)
+        if row == len(self.vectors):
+            self._resize(2 * row)
+        self.vectors[row] = vector
+        self.created[row] = created
+        self.alive[row] = True
+        self.ids.append(entry_id)
+        self.rows[entry_id] = row
+
+    def remove(self, entry_id: int):
+        self.alive[self.rows.pop(entry_id)] = False
+
+    def _resize(self, capacity: int):
+        used = len(self.ids)
+        vectors = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+        created = np.empty(capacity, dtype=np.float64)
+        alive = np.zeros(capacity, dtype=bool)
+        vectors[:used], created[:used], alive[:used] = self.vectors[:used], self.created[:used], self.alive[:used]
+        self.vectors, self.created, self.alive = vectors, created, alive
+
+    def _compact(self):
+        keep = np.flatnonzero(self.alive[:len(self.ids)])
+        count = len(keep)
+        self.vectors[:count] = self.vectors[keep]
+        self.created[:count] = self.created[keep]
+        self.alive[:count] = True
+        self.alive[count:] = False
+        self.ids = [self.ids[row] for row in keep]
+        self.rows = {entry_id: row for row, entry_id in enumerate(self.ids)}
+
+
+class SemanticCache:
+    """
+    In-process answer cache keyed by query embedding.
+
+    A lookup hits when a stored query with the same entity/intent has cosine
+    similarity >= threshold with the incoming one. Entries are evicted LRU
+    once the byte budget or entry limit is exceeded, and expire after ttl.
+    Embeddings are expected to be L2-normalised (all-MiniLM-L6-v2 is
+    configured with normalize_embeddings=True), so cosine is a dot product.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        ttl_seconds: float = 3600.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: int = 10000
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        # Stacked embeddings per partition, appended to on store
+        self._partitions: Dict[Tuple, _PartitionMatrix] = {}
+        self._next_id = 0
+        self.size_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache":
+        return cls(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92)),
+            ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL", 3600)),
+            max_bytes=int(os.getenv("SEMANTIC_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 10000)),
+        )
+
+    @staticmethod
+    def _partition(entity: Optional[str], intent: Optional[str]) -> Tuple:
+        return (
+            entity.strip().lower() if entity else None,
+            intent.strip().lower() if intent else None,
+        )
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding, entity: Optional[str] = None, intent: Optional[str] = None) -> Optional[str]:
+        """Return a cached answer for a near-identical query, or None"""
+        partition = self._partition(entity, intent)
+        block = self._partitions.get(partition)
+        if block is None:
+            self.misses += 1
+            return None
+
+        used = len(block.ids)
+        similarities = block.vectors[:used] @ self._normalize(embedding)
+        # Drop expired entries first so one can't hide a valid match below it
+        expired = block.alive[:used] & (time.monotonic() - block.created[:used] > self.ttl_seconds)
+        for row in np.flatnonzero(expired):
+            self._remove(block.ids[row])
+            self.expirations += 1
+
+        similarities[~block.alive[:used]] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        entry_id = block.ids[best]
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        return self._entries[entry_id].answer
+
+    def store(self, embedding, answer: str, entity: Optional[str] = None, intent: Optional[str] = None):
+        """Cache answer for the query represented by embedding"""
+        vector = self._normalize(embedding)
+        size = vector.nbytes + len(answer.encode("utf-8")) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+
+        partition = self._partition(entity, intent)
+        entry_id = self._next_id
+        self._next_id += 1
+        created = time.monotonic()
+        self._entries[entry_id] = _Entry(partition, vector, answer, created, size)
+        block = self._partitions.get(partition)
+        if block is None:
+            block = self._partitions[partition] = _PartitionMatrix(len(vector))
+        block.append(entry_id, vector, created)
+        self.size_bytes += size
+
+        while self._entries and (
+            self.size_bytes > self.max_bytes or len(self._entries) > self.max_entries
+        ):
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._partitions.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self.size_bytes -= entry.size
+        block = self._partitions[entry.partition]
+        block.remove(entry_id)
+        if not block:
+            del self._partitions[entry.partition]
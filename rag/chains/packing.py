@@ -0,0 +1,124 @@
+import logging
+import math
+import os
+import re
+from typing import Dict, List, Set, Tuple
+
+from langchain_core.documents import Document
+
+from retrievers.batching import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Gemini averages about four characters of English per token; close enough for budgeting
+CHARS_PER_TOKEN = 4
+PROMPT_TOKEN_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384)
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def shingles(text: str, size: int) -> Set[int]:
+    """Hashed word size-grams; texts shorter than size give a single shingle"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {hash(tuple(words))}
+    return {hash(tuple(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class ContextPacker:
+    """
+    Builds the prompt's context block within a token budget.
+
+    Documents are taken in retrieval order. A chunk whose word shingles
+    overlap an already packed chunk by dedup_threshold (Jaccard) or more is
+    dropped as a near-duplicate. A chunk that overflows the remaining budget
+    is cut back to whole sentences; if not even its first sentence fits it
+    is skipped and later (shorter) chunks still get a chance. Prompt sizes
+    are recorded per request for /metrics.
+    """
+
+    def __init__(self, max_tokens: int = 1500, dedup_threshold: float = 0.8, shingle_size: int = 5):
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.shingle_size = shingle_size
+
+        self.duplicates = 0
+        self.truncated = 0
+        self.dropped = 0
+        self.prompt_tokens = Histogram(PROMPT_TOKEN_BUCKETS)
+
+    @classmethod
+    def from_env(cls) -> "ContextPacker":
+        return cls(
+            max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", 1500)),
+            dedup_threshold=float(os.getenv("CONTEXT_DEDUP_THRESHOLD", 0.8)),
+            shingle_size=int(os.getenv("CONTEXT_SHINGLE_SIZE", 5))
+        )
+
+    def _trim(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of whole sentences within max_tokens ("" if the first doesn't fit)"""
+        kept, used = [], 0
+        for sentence in SENTENCE_BOUNDARY.split(text):
+            # +1 for the joining space
+            cost = estimate_tokens(sentence) + (1 if kept else 0)
+            if used + cost > max_tokens:
+                break
+            kept.append(sentence)
+            used += cost
+        return " ".join(kept)
+
+    def pack(self, docs: List[Document]) -> Tuple[str, int]:
+        """Context block and its estimated token count"""
+        blocks: List[str] = []
+        packed: List[Set[int]] = []
+        used = 0
+        for doc in docs:
+            text = " ".join(doc.page_content.split())
+            if not text:
+                continue
+            doc_shingles = shingles(text, self.shingle_size)
+            if any(jaccard(doc_shingles, seen) >= self.dedup_threshold for seen in packed):
+                self.duplicates += 1
+                continue
+
+            source = f"(Source: {doc.metadata.get('source', 'unknown')})"
+            # The source line plus the newlines around each block
+            overhead = estimate_tokens(source) + 1
+            remaining = self.max_tokens - used - overhead
+            if estimate_tokens(text) > remaining:
+                text = self._trim(text, remaining)
+                if not text:
+                    self.dropped += 1
+                    continue
+                self.truncated += 1
+
+            blocks.append(f"{text}\n{source}")
+            packed.append(doc_shingles)
+            used += estimate_tokens(text) + overhead
+
+        return "\n\n".join(blocks), used
+
+    def record_prompt(self, prompt: str) -> int:
+        tokens = estimate_tokens(prompt)
+        self.prompt_tokens.observe(tokens)
+        logger.info(f"Prompt size ~{tokens} tokens")
+        return tokens
+
+    def stats(self) -> Dict:
+        return {
+            "max_tokens": self.max_tokens,
+            "dedup_threshold": self.dedup_threshold,
+            "duplicates": self.duplicates,
+            "truncated": self.truncated,
+            "dropped": self.dropped,
+            "prompt_tokens": self.prompt_tokens.stats(),
+        }
@@ -1,8 +1,17 @@
 from llm.gemini import GeminiClient
+from cache.semantic import SemanticCache
+from cache.retrieval import RetrievalCache
+from retrievers.rerank import MMR, Reranker
+from chains.packing import ContextPacker
 from typing import List
 from langchain_core.documents import Document
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Tuple
+
+
+def normalize_answer(text: str) -> str:
+    """Collapse whitespace, the form answers are returned and cached in by both invoke and stream"""
+    return ' '.join(text.split())
 
 
 class RAGRequest(BaseModel):
@@ -12,16 +21,25 @@ class RAGRequest(BaseModel):
     entity: Optional[str] = None
     concept: Optional[List[str]] = None
 class RAGChain:
-    def __init__(self, retriever):
+    def __init__(
+        self,
+        retriever,
+        cache: Optional[SemanticCache] = None,
+        retrieval_cache: Optional[RetrievalCache] = None,
+        reranker: Optional[Reranker] = None,
+        packer: Optional[ContextPacker] = None
+    ):
         self.retriever = retriever
         self.llm = GeminiClient()
+        self.cache = cache
+        self.retrieval_cache = retrieval_cache
+        self.reranker = reranker
+        self.packer = packer or ContextPacker.from_env()
 
     def _format_docs(self, docs: List[Document]) -> str:
-        """Format retrieved documents for context"""
-        return "\n\n".join(
-            f"🔹 {doc.page_content}\n(Source: {doc.metadata.get('source', 'unknown')})"
-            for doc in docs
-        )
+        """Deduplicated context packed into the packer's token budget"""
+        context, _ = self.packer.pack(docs)
+        return context
 
     def _build_prompt(self, request: RAGRequest, context: str) -> str:
         """Construct the professional analyst prompt"""
@@ -48,21 +66,75 @@ class RAGChain:
         Structured Analysis:
         """
 
+    async def _prepare(self, request: RAGRequest) -> Tuple[List[float], Optional[str], Optional[str]]:
+        """Embed the query and return (embedding, cached_answer, prompt); prompt is None on a cache hit"""
+        # 1. Retrieve relevant documents
+        search_query = f"{request.user_q} {request.faq_q} {request.concept}"
+        embedding = None
+
+        # Near-identical question already answered for this entity/intent
+        if self.cache is not None:
+            embedding = await self.retriever.aembed_query(search_query)
+            cached = self.cache.lookup(embedding, request.entity, request.intent)
+            if cached is not None:
+                return embedding, cached, None
+
+        # With a reranker, over-fetch candidates; the cache holds them pre-rerank
+        k = self.reranker.fetch_k if self.reranker is not None else 3
+
+        # Same search already run against this index version: skip the vector store
+        docs = self.retrieval_cache.get(search_query, k) if self.retrieval_cache is not None else None
+        if docs is None:
+            if embedding is None:
+                embedding = await self.retriever.aembed_query(search_query)
+            docs = await self.retriever.aget_relevant_documents(search_query, k=k, embedding=embedding)
+            if self.retrieval_cache is not None:
+                self.retrieval_cache.put(search_query, k, docs)
+
+        if self.reranker is not None:
+            if embedding is None and self.reranker.method == MMR:
+                # Retrieval cache hit: the query vector still comes from the query cache
+                embedding = await self.retriever.aembed_query(search_query)
+            docs = await self.reranker.arerank(search_query, docs, embedding)
+        
+        # 2. Format context
+        formatted_context = self._format_docs(docs)
+        
+        # 3. Generate professional prompt
+        prompt = self._build_prompt(request, formatted_context)
+        self.packer.record_prompt(prompt)
+        return embedding, None, prompt
+
     async def invoke(self, request: RAGRequest):
         """Execute full RAG pipeline with enhanced prompt"""
         try:
-            # 1. Retrieve relevant documents
-            search_query = f"{request.user_q} {request.faq_q} {request.concept}"
-            docs = self.retriever.get_relevant_documents(search_query, k=3)
-            
-            # 2. Format context
-            formatted_context = self._format_docs(docs)
-            
-            # 3. Generate professional prompt
-            prompt = self._build_prompt(request, formatted_context)
+            embedding, cached, prompt = await self._prepare(request)
+            if cached is not None:
+                return cached
             
             # 4. Get LLM response
-            return await self.llm.generate(prompt)
+            answer = normalize_answer(await self.llm.generate(prompt))
+            if self.cache is not None:
+                self.cache.store(embedding, answer, request.entity, request.intent)
+            return answer
             
         except Exception as e:
-            return f"Analysis error: {str(e)}"
\ No newline at end of file
+            return f"Analysis error: {str(e)}"
+
+    async def stream(self, request: RAGRequest) -> AsyncIterator[str]:
+        """
+        Execute the RAG pipeline, yielding answer text chunks as Gemini produces them.
+        Failures are raised, not yielded, so callers can tell them from answer text.
+        """
+        embedding, cached, prompt = await self._prepare(request)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        async for chunk in self.llm.generate_stream(prompt):
+            chunks.append(chunk)
+            yield chunk
+
+        if self.cache is not None and chunks:
+            self.cache.store(embedding, normalize_answer(''.join(chunks)), request.entity, request.intent)
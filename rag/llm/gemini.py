@@ -37,6 +37,7 @@ from google import genai
 from google.genai import types
 import os
 from tenacity import retry, stop_after_attempt, wait_exponential
+from typing import AsyncIterator
 import json
 
 class GeminiClient:
@@ -78,4 +79,23 @@ class GeminiClient:
             clean_text = ' '.join(text.split())
             return clean_text
         except Exception as e:
-            raise ValueError(f"Gemini generation failed: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Gemini generation failed: {str(e)}")
+
+    async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream response text chunks from Gemini as they are generated"""
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+            model='gemini-1.5-flash',
+            contents=prompt,
+            config = types.GenerateContentConfig(
+            temperature=0.5,
+            top_p=0.8,
+            max_output_tokens=1024,
+            ),
+            )
+            async for chunk in stream:
+                # Chunk boundaries can fall inside words, so keep whitespace as-is
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            raise ValueError(f"Gemini streaming failed: {str(e)}")
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+LATENCY_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class Histogram:
+    """Cumulative bucket histogram (Prometheus-style 'le' buckets)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def stats(self) -> Dict:
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = self.count
+        return {
+            "buckets": cumulative,
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+        }
+
+
+class EmbeddingBatcher:
+    """
+    Async micro-batcher for query embeddings.
+
+    Concurrent embed() calls are collected for up to max_wait_ms or until
+    max_batch_size texts are queued, then encoded together with one call to
+    encode (e.g. HuggingFaceEmbeddings.embed_documents) on the executor.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], List[List[float]]],
+        executor: Optional[Executor] = None,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        self.encode = encode
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_latency_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.encode_latency_ms = Histogram(LATENCY_MS_BUCKETS)
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        # Identical texts in one window are encoded once
+        unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.queue_latency_ms.observe(1000 * (started - enqueued))
+        self.batch_sizes.observe(len(unique_texts))
+
+        loop = asyncio.get_running_loop()
+        try:
+            vectors = await loop.run_in_executor(self.executor, self.encode, unique_texts)
+        except Exception as e:
+            logger.error(f"Batched embedding failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.encode_latency_ms.observe(1000 * (time.perf_counter() - started))
+
+        by_text = dict(zip(unique_texts, vectors))
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batch_size": self.batch_sizes.stats(),
+            "queue_latency_ms": self.queue_latency_ms.stats(),
+            "encode_latency_ms": self.encode_latency_ms.stats(),
+        }
@@ -0,0 +1,138 @@
+import os
+import re
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Keeps ticker- and jargon-like tokens whole: "s&p", "d/e", "10-k", "ebitda", "u.s."
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[&./'-][a-z0-9]+)*")
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have how i if in into is it its of on or
+that the their there these this to was were what when where which who why will with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index in CSR form.
+
+    Postings for term t are doc_ids[offsets[t]:offsets[t + 1]] with the
+    matching BM25 term-frequency weights precomputed in weights, so a query
+    is one vectorised scatter-add per query term. Roughly 8 bytes per
+    posting, versus hundreds for dict-of-lists postings.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        weights: np.ndarray,
+        idf: np.ndarray,
+        num_docs: int
+    ):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.idf = idf
+        self.num_docs = num_docs
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        vocabulary: Dict[str, int] = {}
+        term_ids: List[np.ndarray] = []
+        row_ids: List[np.ndarray] = []
+        lengths = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            ids = np.fromiter(
+                (vocabulary.setdefault(token, len(vocabulary)) for token in tokens),
+                dtype=np.int32, count=len(tokens)
+            )
+            term_ids.append(ids)
+            row_ids.append(np.full(len(ids), row, dtype=np.int32))
+
+        num_docs = len(lengths)
+        doc_lengths = np.asarray(lengths, dtype=np.float32)
+        terms = np.concatenate(term_ids) if term_ids else np.zeros(0, dtype=np.int32)
+        rows = np.concatenate(row_ids) if row_ids else np.zeros(0, dtype=np.int32)
+
+        # One (term, doc) pair per posting with its term frequency, sorted by term then doc
+        pairs = terms.astype(np.int64) * max(num_docs, 1) + rows
+        unique_pairs, term_freqs = np.unique(pairs, return_counts=True)
+        posting_terms = (unique_pairs // max(num_docs, 1)).astype(np.int32)
+        doc_ids = (unique_pairs % max(num_docs, 1)).astype(np.int32)
+
+        doc_freqs = np.bincount(posting_terms, minlength=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=offsets[1:])
+
+        average_length = doc_lengths.mean() if num_docs else 0.0
+        norm = k1 * (1 - b + b * doc_lengths[doc_ids] / max(average_length, 1e-9))
+        weights = (term_freqs * (k1 + 1) / (term_freqs + norm)).astype(np.float32)
+        idf = np.log1p((num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+
+        return cls(vocabulary, offsets, doc_ids, weights, idf, num_docs)
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Top k (row, score) pairs; rows with no query term are never returned"""
+        term_ids = {self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary}
+        if not term_ids or not self.num_docs:
+            return []
+
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term in term_ids:
+            start, end = self.offsets[term], self.offsets[term + 1]
+            # A doc appears once per term's postings, so plain fancy-index add is safe
+            scores[self.doc_ids[start:end]] += self.idf[term] * self.weights[start:end]
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [(int(row), float(scores[row])) for row in matched]
+
+    def save(self, path: str):
+        terms = np.array(sorted(self.vocabulary, key=self.vocabulary.get))
+        np.savez(
+            path, terms=terms, offsets=self.offsets, doc_ids=self.doc_ids,
+            weights=self.weights, idf=self.idf, num_docs=np.array(self.num_docs)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        data = np.load(path)
+        vocabulary = {str(term): i for i, term in enumerate(data["terms"])}
+        return cls(
+            vocabulary, data["offsets"], data["doc_ids"], data["weights"],
+            data["idf"], int(data["num_docs"])
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.doc_ids.nbytes + self.weights.nbytes + self.idf.nbytes
+
+    def stats(self) -> Dict:
+        return {
+            "documents": self.num_docs,
+            "terms": len(self.vocabulary),
+            "postings": len(self.doc_ids),
+            "postings_bytes": self.nbytes,
+        }
+
+
+def load_or_build(corpus_path: str, texts_fn, index_path: str = "") -> BM25Index:
+    """Load a saved index newer than its corpus, else build one (and save it if index_path is set)"""
+    if index_path and os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(corpus_path):
+        return BM25Index.load(index_path)
+    index = BM25Index.build(texts_fn())
+    if index_path:
+        index.save(index_path)
+    return index
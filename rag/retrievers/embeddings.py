@@ -0,0 +1,40 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from cache.embeddings import CachedEmbeddings
+from retrievers.batching import EmbeddingBatcher
+
+# all-MiniLM-L6-v2 output size
+EMBEDDING_DIM = 384
+
+# Bounded pool for CPU-bound encoding/search so the event loop never blocks on it
+RETRIEVAL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RETRIEVAL_THREADS", 4)),
+    thread_name_prefix="retrieval"
+)
+
+async def run_in_retrieval_pool(func: Callable, *args):
+    """Run a blocking retrieval step on RETRIEVAL_EXECUTOR"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(RETRIEVAL_EXECUTOR, func, *args)
+
+def build_embeddings() -> CachedEmbeddings:
+    """Query encoder shared by every retriever backend, behind an LRU + memory-mapped cache"""
+    # Imported here so backends and tests that inject their own encoder never load torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    model = HuggingFaceEmbeddings(
+        model_name="all-MiniLM-L6-v2",
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+    # Concurrent query misses are encoded together in one forward pass
+    batcher = EmbeddingBatcher(
+        model.embed_documents,
+        executor=RETRIEVAL_EXECUTOR,
+        max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", 32)),
+        max_wait_ms=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 5))
+    )
+    return CachedEmbeddings.from_env(model, dim=EMBEDDING_DIM, batcher=batcher)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from retrievers.bm25 import BM25Index, load_or_build
+from retrievers.embeddings import run_in_retrieval_pool
+from retrievers.local import METADATA_FILE, MetadataSidecar
+
+logger = logging.getLogger(__name__)
+
+
+class HybridRetriever:
+    """
+    Dense retriever plus an in-memory BM25 index over the same chunks.
+
+    Both searches run concurrently, each over-fetching candidates_per_k * k
+    results, and are fused with reciprocal-rank fusion. Exact-term matches
+    (tickers, covenant names, ratios) that the embedding misses still make
+    it into the top k. Chunks are matched across the two lists by text.
+    """
+
+    def __init__(
+        self,
+        dense,
+        sparse: BM25Index,
+        corpus: MetadataSidecar,
+        rrf_k: int = 60,
+        candidates_per_k: int = 4
+    ):
+        if len(corpus) != sparse.num_docs:
+            raise ValueError(f"BM25 index rows ({sparse.num_docs}) do not match corpus rows ({len(corpus)})")
+        self.dense = dense
+        self.sparse = sparse
+        self.corpus = corpus
+        self.rrf_k = rrf_k
+        self.candidates_per_k = candidates_per_k
+
+    @classmethod
+    def from_env(cls, dense) -> "HybridRetriever":
+        """
+        BM25_CORPUS_PATH: JSON-lines chunk export ({"text", "metadata"} per line),
+        defaulting to the local index's metadata.jsonl; BM25_INDEX_PATH (.npz)
+        caches the built postings between restarts.
+        """
+        corpus_path = os.getenv(
+            "BM25_CORPUS_PATH",
+            os.path.join(os.getenv("LOCAL_INDEX_DIR", "local_index"), METADATA_FILE)
+        )
+        corpus = MetadataSidecar(corpus_path)
+        sparse = load_or_build(
+            corpus_path,
+            lambda: (corpus.get(row).get("text", "") for row in range(len(corpus))),
+            os.getenv("BM25_INDEX_PATH", "")
+        )
+        logger.info(f"BM25 index over {corpus_path}: {sparse.stats()}")
+        return cls(
+            dense,
+            sparse,
+            corpus,
+            rrf_k=int(os.getenv("HYBRID_RRF_K", 60)),
+            candidates_per_k=int(os.getenv("HYBRID_CANDIDATES_PER_K", 4))
+        )
+
+    def reload(self) -> "HybridRetriever":
+        """Reload the dense index (when it lives on disk) and rebuild BM25 over the current corpus"""
+        dense = self.dense.reload() if hasattr(self.dense, "reload") else self.dense
+        return HybridRetriever.from_env(dense)
+
+    @property
+    def embedding(self):
+        return self.dense.embedding
+
+    @property
+    def index_version(self) -> str:
+        return getattr(self.dense, "index_version", "")
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.dense.embed_query(query)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        return await self.dense.aembed_query(query)
+
+    def _sparse_documents(self, query: str, k: int) -> List[Document]:
+        documents = []
+        for row, score in self.sparse.search(query, k):
+            record = self.corpus.get(row)
+            metadata = dict(record.get("metadata", {}))
+            metadata["bm25_score"] = score
+            documents.append(Document(page_content=record.get("text", ""), metadata=metadata))
+        return documents
+
+    def _fuse(self, result_lists: List[List[Document]], k: int) -> List[Document]:
+        scores: Dict[str, float] = {}
+        documents: Dict[str, Document] = {}
+        for results in result_lists:
+            for rank, doc in enumerate(results, 1):
+                key = doc.page_content
+                scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank)
+                if key in documents:
+                    # Same chunk from both searches: keep both sides' scores
+                    documents[key].metadata.update(doc.metadata)
+                else:
+                    documents[key] = doc
+
+        fused = sorted(scores, key=scores.get, reverse=True)[:k]
+        for key in fused:
+            documents[key].metadata["rrf_score"] = scores[key]
+        return [documents[key] for key in fused]
+
+    def get_relevant_documents(self, query: str, k: int = 3, embedding: Optional[List[float]] = None):
+        fetch_k = k * self.candidates_per_k
+        dense = self.dense.get_relevant_documents(query, k=fetch_k, embedding=embedding)
+        return self._fuse([dense, self._sparse_documents(query, fetch_k)], k)
+
+    async def aget_relevant_documents(self, query: str, k: int = 3, embedding: Optional[List[float]] = None):
+        """Dense and BM25 searches concurrently, fused with reciprocal-rank fusion"""
+        fetch_k = k * self.candidates_per_k
+        dense, sparse = await asyncio.gather(
+            self.dense.aget_relevant_documents(query, k=fetch_k, embedding=embedding),
+            run_in_retrieval_pool(self._sparse_documents, query, fetch_k)
+        )
+        return self._fuse([dense, sparse], k)
+
+    def stats(self) -> Dict:
+        return {"bm25": self.sparse.stats(), "rrf_k": self.rrf_k, "candidates_per_k": self.candidates_per_k}
@@ -0,0 +1,235 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from retrievers.embeddings import build_embeddings, run_in_retrieval_pool
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.jsonl"
+IVF_FILE = "ivf.npz"
+
+
+class LocalVectorIndex:
+    """
+    NumPy vector index over a memory-mapped float32 matrix of L2-normalised rows.
+
+    Small corpora are searched exactly with one matrix-vector product. Above
+    ivf_threshold rows an IVF index (spherical k-means centroids + inverted
+    lists) is used, scanning only the nprobe closest lists.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ivf_threshold: int = 50000,
+        nprobe: int = 8,
+        centroids: Optional[np.ndarray] = None,
+        list_order: Optional[np.ndarray] = None,
+        list_offsets: Optional[np.ndarray] = None
+    ):
+        self.vectors = vectors
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.centroids = centroids
+        self.list_order = list_order
+        self.list_offsets = list_offsets
+
+        if self.centroids is None and len(vectors) >= ivf_threshold:
+            self.train_ivf()
+
+    @property
+    def uses_ivf(self) -> bool:
+        return self.centroids is not None
+
+    def train_ivf(self, n_lists: Optional[int] = None, iterations: int = 10, sample_size: int = 50000, seed: int = 0):
+        """Cluster rows with spherical k-means and build the inverted lists"""
+        n_rows = len(self.vectors)
+        n_lists = n_lists or max(1, int(np.sqrt(n_rows)))
+        rng = np.random.default_rng(seed)
+
+        sample = np.asarray(self.vectors[rng.choice(n_rows, size=min(sample_size, n_rows), replace=False)])
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = sample[assignments == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        # Assign every row in chunks to keep memory flat on large memmaps
+        assignments = np.concatenate([
+            np.argmax(np.asarray(self.vectors[start:start + 65536]) @ centroids.T, axis=1)
+            for start in range(0, n_rows, 65536)
+        ])
+        self.centroids = centroids.astype(np.float32)
+        self.list_order = np.argsort(assignments, kind="stable").astype(np.int64)
+        self.list_offsets = np.searchsorted(assignments[self.list_order], np.arange(n_lists + 1))
+
+    def save_ivf(self, path: str, corpus_version: str = ""):
+        """Persist the IVF lists, tagged with the corpus they were trained on"""
+        np.savez(
+            path, centroids=self.centroids, list_order=self.list_order,
+            list_offsets=self.list_offsets, corpus_version=np.array(corpus_version)
+        )
+
+    def search(self, query: np.ndarray, k: int) -> List[tuple]:
+        """Return [(row, score)] for the k highest dot-product rows"""
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        if self.uses_ivf:
+            probes = np.argsort(self.centroids @ query)[::-1][:self.nprobe]
+            candidates = np.concatenate([
+                self.list_order[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes
+            ])
+            candidates.sort()  # sequential access on the memmap
+            scores = np.asarray(self.vectors[candidates]) @ query
+        else:
+            candidates = None
+            scores = np.asarray(self.vectors) @ query
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = candidates[top] if candidates is not None else top
+        return [(int(row), float(scores[i])) for row, i in zip(rows, top)]
+
+
+class MetadataSidecar:
+    """JSON-lines sidecar ({"text": ..., "metadata": {...}} per row) read lazily by byte offset"""
+
+    def __init__(self, path: str):
+        self.path = path
+        offsets = [0]
+        with open(path, "rb") as f:
+            for line in f:
+                offsets.append(offsets[-1] + len(line))
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self._fd = os.open(path, os.O_RDONLY)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, row: int) -> Dict:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        # pread keeps concurrent lookups from different threads independent
+        return json.loads(os.pread(self._fd, end - start, start))
+
+    def __del__(self):
+        # Closed only once nothing (e.g. a retriever replaced on reload) still reads it
+        if getattr(self, "_fd", None) is not None:
+            os.close(self._fd)
+
+
+class LocalRetriever:
+    """Drop-in alternative to PineconeRetriever backed by a LocalVectorIndex on disk"""
+
+    def __init__(
+        self,
+        index_dir: str,
+        embedding=None,
+        ivf_threshold: int = 50000,
+        nprobe: int = 8
+    ):
+        if embedding is None:
+            embedding = build_embeddings()
+        self.embedding = embedding
+        self.index_dir = index_dir
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+
+        vectors_path = os.path.join(index_dir, VECTORS_FILE)
+        vectors = np.load(vectors_path, mmap_mode="r")
+        # write_corpus rewrites vectors.npy, so its mtime identifies the ingested corpus
+        self.index_version = f"{len(vectors)}-{os.stat(vectors_path).st_mtime_ns}"
+        self.metadata = MetadataSidecar(os.path.join(index_dir, METADATA_FILE))
+        if len(self.metadata) != len(vectors):
+            raise ValueError(
+                f"Metadata rows ({len(self.metadata)}) do not match vector rows ({len(vectors)})"
+            )
+
+        ivf_path = os.path.join(index_dir, IVF_FILE)
+        ivf = {}
+        if os.path.exists(ivf_path) and len(vectors) >= ivf_threshold:
+            ivf = self._load_ivf(ivf_path, len(vectors))
+
+        self.index = LocalVectorIndex(vectors, ivf_threshold=ivf_threshold, nprobe=nprobe, **ivf)
+        if self.index.uses_ivf and not ivf:
+            try:
+                self.index.save_ivf(ivf_path, self.index_version)
+            except OSError as e:
+                logger.warning(f"Could not persist IVF index: {e}")
+
+    def _load_ivf(self, path: str, n_rows: int) -> Dict[str, np.ndarray]:
+        """Saved IVF lists, or {} (retrain) if they were built for a different corpus"""
+        data = np.load(path)
+        version = str(data["corpus_version"]) if "corpus_version" in data.files else None
+        if version != self.index_version or int(data["list_offsets"][-1]) != n_rows:
+            logger.info(f"Ignoring stale IVF index at {path} (corpus version {version}), retraining")
+            return {}
+        return {name: data[name] for name in ("centroids", "list_order", "list_offsets")}
+
+    def reload(self) -> "LocalRetriever":
+        """A retriever over the corpus now on disk, sharing this one's embedding model"""
+        return LocalRetriever(self.index_dir, self.embedding, self.ivf_threshold, self.nprobe)
+
+    @classmethod
+    def from_env(cls) -> "LocalRetriever":
+        return cls(
+            index_dir=os.getenv("LOCAL_INDEX_DIR", "local_index"),
+            ivf_threshold=int(os.getenv("LOCAL_INDEX_IVF_THRESHOLD", 50000)),
+            nprobe=int(os.getenv("LOCAL_INDEX_NPROBE", 8))
+        )
+
+    @staticmethod
+    def write_corpus(index_dir: str, vectors: np.ndarray, records: List[Dict]):
+        """Write vectors.npy + metadata.jsonl in the layout LocalRetriever loads"""
+        os.makedirs(index_dir, exist_ok=True)
+        # IVF lists index rows of the old corpus; LocalRetriever retrains them on load
+        ivf_path = os.path.join(index_dir, IVF_FILE)
+        if os.path.exists(ivf_path):
+            os.remove(ivf_path)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        np.save(os.path.join(index_dir, VECTORS_FILE), vectors)
+        with open(os.path.join(index_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query with the same model used for the index"""
+        return self.embedding.embed_query(query)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embed a query without blocking the event loop (cached, micro-batched on misses)"""
+        return await self.embedding.aembed_query(query)
+
+    def get_relevant_documents(self, query: str, k: int = 3, embedding: Optional[List[float]] = None):
+        """Retrieve top k most relevant documents (pass embedding to skip re-encoding the query)"""
+        if embedding is None:
+            embedding = self.embed_query(query)
+
+        documents = []
+        for row, score in self.index.search(embedding, k):
+            record = self.metadata.get(row)
+            metadata = dict(record.get("metadata", {}))
+            metadata["score"] = score
+            documents.append(Document(page_content=record.get("text", ""), metadata=metadata))
+        return documents
+
+    async def aget_relevant_documents(self, query: str, k: int = 3, embedding: Optional[List[float]] = None):
+        """Async retrieval: encode and search on the bounded retrieval thread pool"""
+        if embedding is None:
+            embedding = await self.aembed_query(query)
+        return await run_in_retrieval_pool(self.get_relevant_documents, query, k, embedding)
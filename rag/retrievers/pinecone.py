@@ -1,30 +1,48 @@
-from langchain_huggingface import HuggingFaceEmbeddings  # Updated import
 from langchain_pinecone import PineconeVectorStore  # Recommended new import
 from pinecone import Pinecone
+from typing import List, Optional
 import os
 
+from retrievers.embeddings import build_embeddings
+
 class PineconeRetriever:
     def __init__(self):
         # Initialize Pinecone client (new SDK)
         pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
         
-        # Initialize embeddings (new package)
-        self.embedding = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        # Initialize embeddings (new package), behind an LRU + memory-mapped cache
+        self.embedding = build_embeddings()
         
+        index_name = os.getenv("PINECONE_INDEX_NAME", "new-credit-analyst-rag-v2")
+        # Bump RAG_INDEX_VERSION after re-ingesting so cached retrievals are dropped
+        self.index_version = os.getenv("RAG_INDEX_VERSION", index_name)
+
         # Initialize vectorstore (recommended new way)
         self.vectorstore = PineconeVectorStore(
-            index_name=os.getenv("PINECONE_INDEX_NAME", "new-credit-analyst-rag-v2"),
+            index_name=index_name,
             embedding=self.embedding,
             text_key="text"  # Must match your metadata field
         )
 
-    def get_relevant_documents(self, query: str, k: int = 3):
-        """Retrieve top k most relevant documents"""
-        return self.vectorstore.similarity_search(query, k=k)
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query with the same model used for the index"""
+        return self.embedding.embed_query(query)
+
+    def get_relevant_documents(self, query: str, k: int = 3, embedding: Optional[List[float]] = None):
+        """Retrieve top k most relevant documents (pass embedding to skip re-encoding the query)"""
+        if embedding is None:
+            embedding = self.embed_query(query)
+        return self.vectorstore.similarity_search_by_vector(embedding, k=k)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embed a query without blocking the event loop (cached, micro-batched on misses)"""
+        return await self.embedding.aembed_query(query)
+
+    async def aget_relevant_documents(self, query: str, k: int = 3, embedding: Optional[List[float]] = None):
+        """Async retrieval: encode off the event loop, then query Pinecone with its async client"""
+        if embedding is None:
+            embedding = await self.aembed_query(query)
+        return await self.vectorstore.asimilarity_search_by_vector(embedding, k=k)
 
 # class PineconeRetriever:
 #     def __init__(self):
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from retrievers.batching import Histogram
+
+logger = logging.getLogger(__name__)
+
+MMR = "mmr"
+CROSS_ENCODER = "cross_encoder"
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500)
+
+
+def mmr_select(query_vector: np.ndarray, doc_vectors: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """
+    Maximal marginal relevance over L2-normalised vectors: each pick maximises
+    lambda * sim(query, doc) - (1 - lambda) * max sim(doc, already picked).
+    The doc-doc similarity matrix is computed once; each step is one vector op.
+    """
+    relevance = doc_vectors @ query_vector
+    pairwise = doc_vectors @ doc_vectors.T
+    k = min(k, len(doc_vectors))
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = pairwise[selected[0]].copy()
+    available = np.ones(len(doc_vectors), dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+    return selected
+
+
+class Reranker:
+    """
+    Optional second stage over an over-fetched candidate list.
+
+    "mmr" embeds the candidates in one batch with the raw document encoder
+    (never the query cache, which would fill up with chunk vectors) and
+    picks a relevant but non-redundant top k; "cross_encoder" scores every
+    (query, chunk) pair with a small CPU cross-encoder in one forward pass.
+    Either way the work must finish within budget_ms, otherwise the
+    retriever's own order is kept. One CPU forward pass over 20 chunks with
+    a MiniLM-sized model takes on the order of 100-200ms even after
+    warm_up, so budgets much below the 250ms default mostly fall back.
+
+    Reranks run on their own max_in_flight threads, not the retrieval pool.
+    An overrun keeps its thread until it finishes, so when every slot is
+    busy the request skips reranking instead of queueing behind them.
+    """
+
+    def __init__(
+        self,
+        embedding=None,
+        method: str = MMR,
+        fetch_k: int = 20,
+        top_k: int = 3,
+        budget_ms: float = 250.0,
+        lambda_mult: float = 0.7,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        max_in_flight: int = 2
+    ):
+        if method not in (MMR, CROSS_ENCODER):
+            raise ValueError(f"Unknown rerank method '{method}', expected '{MMR}' or '{CROSS_ENCODER}'")
+        if method == MMR and embedding is None:
+            raise ValueError("MMR reranking needs an embedding model")
+        self.embedding = embedding
+        self.method = method
+        self.fetch_k = fetch_k
+        self.top_k = top_k
+        self.budget_ms = budget_ms
+        self.lambda_mult = lambda_mult
+        self.model_name = model_name
+        self._model = None
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="rerank")
+        # Released by the worker when a rerank actually finishes, even one we stopped waiting for
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+        self.reranked = 0
+        self.skipped = 0
+        self.fallbacks = 0
+        self.errors = 0
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    @classmethod
+    def from_env(cls, embedding) -> Optional["Reranker"]:
+        """
+        RERANK_METHOD=mmr|cross_encoder enables reranking; unset or "none" disables it.
+        embedding encodes the candidate chunks for MMR and should be the uncached model.
+        """
+        method = os.getenv("RERANK_METHOD", "none").lower()
+        if method == "none":
+            return None
+        return cls(
+            embedding=embedding,
+            method=method,
+            fetch_k=int(os.getenv("RERANK_FETCH_K", 20)),
+            top_k=int(os.getenv("RERANK_TOP_K", 3)),
+            budget_ms=float(os.getenv("RERANK_BUDGET_MS", 250)),
+            lambda_mult=float(os.getenv("RERANK_MMR_LAMBDA", 0.7)),
+            model_name=os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+            max_in_flight=int(os.getenv("RERANK_MAX_IN_FLIGHT", 2))
+        )
+
+    @property
+    def model(self):
+        if self._model is None:
+            # Imported lazily so MMR-only deployments never load the cross-encoder
+            from sentence_transformers import CrossEncoder
+            self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def warm_up(self):
+        """Load the cross-encoder up front so the first request isn't charged for it"""
+        if self.method == CROSS_ENCODER:
+            self.model.predict([("warm up", "warm up")])
+
+    def _order(self, query: str, query_embedding: Optional[List[float]], docs: List[Document]) -> List[int]:
+        texts = [doc.page_content for doc in docs]
+        if self.method == CROSS_ENCODER:
+            scores = np.asarray(self.model.predict([(query, text) for text in texts], batch_size=len(texts)))
+            return [int(i) for i in np.argsort(-scores)[:self.top_k]]
+
+        if query_embedding is None:
+            query_embedding = self.embedding.embed_query(query)
+        doc_vectors = np.asarray(self.embedding.embed_documents(texts), dtype=np.float32)
+        doc_vectors /= np.maximum(np.linalg.norm(doc_vectors, axis=1, keepdims=True), 1e-12)
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+        return mmr_select(query_vector, doc_vectors, self.top_k, self.lambda_mult)
+
+    async def arerank(
+        self,
+        query: str,
+        docs: List[Document],
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Document]:
+        """Top top_k of docs after reranking, or docs[:top_k] if reranking is busy, fails or runs over budget"""
+        if len(docs) <= 1:
+            return docs[:self.top_k]
+        if not self._slots.acquire(blocking=False):
+            self.skipped += 1
+            return docs[:self.top_k]
+
+        start = time.perf_counter()
+        future = self._executor.submit(self._order, query, query_embedding, docs)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            order = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.budget_ms / 1000)
+        except asyncio.TimeoutError:
+            # The thread finishes in the background and keeps its slot until then
+            self.fallbacks += 1
+            logger.warning(f"Rerank exceeded {self.budget_ms}ms budget, keeping retriever order")
+            return docs[:self.top_k]
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Rerank failed, keeping retriever order: {e}")
+            return docs[:self.top_k]
+        finally:
+            self.latency_ms.observe(1000 * (time.perf_counter() - start))
+
+        self.reranked += 1
+        return [docs[i] for i in order]
+
+    def stats(self) -> Dict:
+        return {
+            "method": self.method,
+            "fetch_k": self.fetch_k,
+            "top_k": self.top_k,
+            "budget_ms": self.budget_ms,
+            "max_in_flight": self.max_in_flight,
+            "reranked": self.reranked,
+            "skipped": self.skipped,
+            "fallbacks": self.fallbacks,
+            "errors": self.errors,
+            "latency_ms": self.latency_ms.stats(),
+        }
@@ -0,0 +1,45 @@
+from langchain_core.documents import Document
+
+from chains.packing import ContextPacker, estimate_tokens
+
+
+def test_oversized_first_chunk_does_not_empty_the_context():
+    long_chunk = Document(page_content="covenant " * 200, metadata={"source": "long"})
+    short_chunk = Document(page_content="Leverage is capped at 4x EBITDA.", metadata={"source": "short"})
+    packer = ContextPacker(max_tokens=100)
+
+    context, tokens = packer.pack([long_chunk, short_chunk])
+
+    assert "Leverage is capped at 4x EBITDA." in context
+    assert "(Source: short)" in context
+    assert "(Source: long)" not in context
+    assert 0 < tokens <= 100
+    assert packer.dropped == 1
+
+
+def test_overflowing_chunk_is_trimmed_to_whole_sentences():
+    first = Document(page_content="Alpha ratio is stable. " * 10, metadata={"source": "a"})
+    second = Document(page_content="Beta covers interest. " * 40, metadata={"source": "b"})
+    packer = ContextPacker(max_tokens=120)
+
+    context, tokens = packer.pack([first, second])
+
+    trimmed = context.split("\n\n")[1].split("\n")[0]
+    assert trimmed.endswith(".")
+    assert packer.truncated == 1
+    assert tokens <= 120
+
+
+def test_near_duplicates_are_dropped():
+    text = "Debt service coverage ratio measures cash available to pay debt obligations."
+    docs = [
+        Document(page_content=text, metadata={"source": "a"}),
+        Document(page_content=text + " ", metadata={"source": "b"}),
+    ]
+    packer = ContextPacker()
+
+    context, _ = packer.pack(docs)
+
+    assert context.count(text) == 1
+    assert packer.duplicates == 1
+    assert estimate_tokens(context) > 0
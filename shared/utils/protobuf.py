@@ -0,0 +1,181 @@
+"""
+Conversion between the services' Pydantic schemas / plain dicts and the
+generated protobuf messages (run compile_protos.py first).
+
+Conversion walks the message descriptor directly instead of going through
+json_format, which formats and re-parses every value as JSON.
+"""
+from typing import Any, Dict, List, Optional, Type, Union
+
+from google.protobuf import json_format
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.message import Message
+from pydantic import BaseModel
+
+from shared.protos.compiled import mcp_core_pb2, searcher_pb2, validator_pb2
+
+# google.protobuf.Struct/Value/ListValue carry arbitrary JSON; json_format is the only sane route
+JSON_TYPES = frozenset({
+    "google.protobuf.Struct",
+    "google.protobuf.Value",
+    "google.protobuf.ListValue",
+})
+
+
+def _is_repeated(field: FieldDescriptor) -> bool:
+    # protobuf >= 5 exposes is_repeated; older releases only have label
+    if hasattr(field, "is_repeated"):
+        return field.is_repeated
+    return field.label == FieldDescriptor.LABEL_REPEATED
+
+
+def _is_map(field: FieldDescriptor) -> bool:
+    return field.message_type is not None and field.message_type.GetOptions().map_entry
+
+
+def _fill(message: Message, data: Dict[str, Any]) -> Message:
+    fields = message.DESCRIPTOR.fields_by_name
+    for name, value in data.items():
+        field = fields.get(name)
+        if field is None or value is None:
+            continue
+        target = getattr(message, name) if field.message_type is not None or _is_repeated(field) else None
+
+        if _is_map(field):
+            value_field = field.message_type.fields_by_name["value"]
+            for key, item in value.items():
+                if value_field.message_type is not None:
+                    _fill(target[key], item)
+                else:
+                    target[key] = item
+        elif field.message_type is not None and field.message_type.full_name in JSON_TYPES:
+            json_format.ParseDict(value, target)
+        elif field.message_type is not None:
+            if _is_repeated(field):
+                for item in value:
+                    _fill(target.add(), item)
+            else:
+                _fill(target, value)
+        elif field.enum_type is not None:
+            # Enums are accepted by name or number
+            numbers = [
+                field.enum_type.values_by_name[item].number if isinstance(item, str) else item
+                for item in (value if _is_repeated(field) else [value])
+            ]
+            if _is_repeated(field):
+                target.extend(numbers)
+            else:
+                setattr(message, name, numbers[0])
+        elif _is_repeated(field):
+            target.extend(value)
+        else:
+            setattr(message, name, value)
+    return message
+
+
+def to_message(data: Union[BaseModel, Dict[str, Any]], message_cls: Type[Message]) -> Message:
+    """Build a message from a Pydantic model or dict; keys the message doesn't define are ignored"""
+    if isinstance(data, BaseModel):
+        data = data.model_dump(exclude_none=True)
+    return _fill(message_cls(), data)
+
+
+def _value(field: FieldDescriptor, value: Any) -> Any:
+    if field.message_type is not None:
+        if field.message_type.full_name in JSON_TYPES:
+            return json_format.MessageToDict(value)
+        return message_to_dict(value)
+    if field.enum_type is not None:
+        return field.enum_type.values_by_number[value].name
+    return value
+
+
+def message_to_dict(message: Message) -> Dict[str, Any]:
+    """Plain dict of a message; unset optional fields are omitted so model defaults apply"""
+    result = {}
+    for field in message.DESCRIPTOR.fields:
+        if field.has_presence and not _is_repeated(field) and not message.HasField(field.name):
+            continue
+        value = getattr(message, field.name)
+        if _is_map(field):
+            value_field = field.message_type.fields_by_name["value"]
+            result[field.name] = {key: _value(value_field, item) for key, item in value.items()}
+        elif _is_repeated(field):
+            result[field.name] = [_value(field, item) for item in value]
+        else:
+            result[field.name] = _value(field, value)
+    return result
+
+
+def from_message(message: Message, model_cls: Optional[Type[BaseModel]] = None) -> Union[BaseModel, Dict[str, Any]]:
+    """Inverse of to_message: a Pydantic model when model_cls is given, else a dict"""
+    data = message_to_dict(message)
+    return model_cls.model_validate(data) if model_cls is not None else data
+
+
+# =============================================================================
+# VALIDATOR
+# =============================================================================
+
+def validation_input(
+    query: str,
+    rag_answer: str,
+    web_results: List[Dict[str, Any]],
+    rag_confidence: Optional[float] = None
+) -> validator_pb2.ValidationInput:
+    """ValidationInput from the same arguments validate_responses takes (web results keyed by url)"""
+    message = validator_pb2.ValidationInput(
+        original_query=mcp_core_pb2.UserQuery(user_q=query),
+        rag_response=mcp_core_pb2.McpResponse(source="rag", answer=rag_answer),
+        web_results=searcher_pb2.SearchResponse(results=[
+            searcher_pb2.SearchResult(
+                title=result.get("title", ""),
+                link=result.get("url") or result.get("link", ""),
+                snippet=result.get("snippet", "")
+            )
+            for result in web_results
+        ])
+    )
+    if rag_confidence is not None:
+        message.rag_response.confidence = rag_confidence
+    return message
+
+
+def validation_arguments(message: validator_pb2.ValidationInput) -> Dict[str, Any]:
+    """Keyword arguments for validate_responses from a ValidationInput"""
+    return {
+        "query": message.original_query.user_q,
+        "rag_response": message.rag_response.answer,
+        "web_results": [
+            {"title": result.title, "url": result.link, "snippet": result.snippet}
+            for result in message.web_results.results
+        ],
+        "rag_confidence": (
+            message.rag_response.confidence
+            if message.rag_response.HasField("confidence") else None
+        ),
+    }
+
+
+def validation_output(result: Dict[str, Any]) -> validator_pb2.ValidationOutput:
+    """ValidationOutput from a validate_responses result"""
+    source = result["best_source"]
+    return validator_pb2.ValidationOutput(
+        base=mcp_core_pb2.McpResponse(source=source, answer=result["selected_answer"], processed=True),
+        chosen_source=validator_pb2.ValidationOutput.SelectedSource.Value(source.upper()),
+        final_output=result["selected_answer"],
+        scores={
+            "rag": validator_pb2.ValidationOutput.SourceScore(score=result["rag_score"]),
+            "web": validator_pb2.ValidationOutput.SourceScore(score=result["web_score"]),
+        }
+    )
+
+
+def validation_result(message: validator_pb2.ValidationOutput) -> Dict[str, Any]:
+    """Inverse of validation_output, in validate_responses' shape"""
+    return {
+        "best_source": validator_pb2.ValidationOutput.SelectedSource.Name(message.chosen_source).lower(),
+        "rag_score": message.scores["rag"].score,
+        "web_score": message.scores["web"].score,
+        "selected_answer": message.final_output,
+    }